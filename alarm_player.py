@@ -0,0 +1,258 @@
+import io
+import math
+import os
+import queue
+import sys
+import threading
+from array import array
+
+SAMPLE_RATE = 22050
+
+# 提醒音模式：(音调列表[(频率Hz, 时长ms, 间隔ms)], 重复次数, 是否逐次增大音量)
+PATTERNS = {
+    # 与早期版本相同：1000Hz，持续1000ms
+    "beep": ([(1000, 1000, 0)], 1, False),
+    # 三连响，重复3遍
+    "repeat": ([(1000, 200, 100), (1000, 200, 100), (1000, 200, 600)], 3, False),
+    # 逐次加大音量并升高音调的三连响，重复4遍
+    "escalate": ([(880, 200, 100), (988, 200, 100), (1175, 300, 600)], 4, True),
+}
+
+DEFAULT_PATTERN = "escalate"
+
+
+def synthesize(tones, volume=0.5, sample_rate=SAMPLE_RATE):
+    """把一组音调合成为16位单声道PCM数据"""
+    samples = array('h')
+    amplitude = int(32767 * max(0.0, min(1.0, volume)))
+    fade = int(sample_rate * 0.005)  # 5ms淡入淡出，避免爆音
+    for freq, duration_ms, gap_ms in tones:
+        count = int(sample_rate * duration_ms / 1000)
+        step = 2 * math.pi * freq / sample_rate
+        for i in range(count):
+            envelope = min(1.0, i / fade, (count - i) / fade) if fade else 1.0
+            samples.append(int(amplitude * envelope * math.sin(step * i)))
+        # 间隔为静音
+        samples.frombytes(bytes(2 * int(sample_rate * gap_ms / 1000)))
+    if sys.byteorder != "little":
+        samples.byteswap()
+    return samples.tobytes()
+
+
+def pattern_buffers(name, sample_rate=SAMPLE_RATE):
+    """返回提醒音模式每一遍的PCM数据列表"""
+    tones, repeats, escalate = PATTERNS[name]
+    buffers = []
+    for index in range(repeats):
+        if escalate:
+            volume = 0.25 + 0.75 * index / max(1, repeats - 1)
+            shift = 1 + 0.06 * index
+            played = [(freq * shift, duration, gap) for freq, duration, gap in tones]
+        else:
+            volume, played = 0.6, tones
+        buffers.append(synthesize(played, volume, sample_rate))
+    return buffers
+
+
+def wav_bytes(pcm, sample_rate=SAMPLE_RATE):
+    """给PCM数据加上WAV文件头"""
+    import wave
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm)
+    return buffer.getvalue()
+
+
+# ---- 播放后端：play()在工作线程中调用，可以阻塞到播放结束 ----
+
+class WinsoundBackend:
+    """Windows：用winsound从内存播放WAV"""
+
+    name = "winsound"
+
+    def __init__(self):
+        import winsound
+        self.winsound = winsound
+
+    def play(self, pcm, sample_rate):
+        self.winsound.PlaySound(wav_bytes(pcm, sample_rate), self.winsound.SND_MEMORY)
+
+    def close(self):
+        pass
+
+
+class CommandBackend:
+    """Linux：把WAV数据通过管道交给aplay播放"""
+
+    name = "command"
+
+    def __init__(self, command=("aplay", "-q", "-")):
+        self.command = list(command)
+
+    def play(self, pcm, sample_rate):
+        import subprocess
+        subprocess.run(self.command, input=wav_bytes(pcm, sample_rate),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def close(self):
+        pass
+
+
+class WavFileBackend:
+    """把播放的全部PCM数据写入一个WAV文件（用于测试和无声卡的机器）"""
+
+    name = "wav"
+
+    def __init__(self, path):
+        self.path = path
+        self._wave = None
+        self.frames_written = 0
+
+    def play(self, pcm, sample_rate):
+        if self._wave is None:
+            import wave
+            self._wave = wave.open(self.path, 'wb')
+            self._wave.setnchannels(1)
+            self._wave.setsampwidth(2)
+            self._wave.setframerate(sample_rate)
+        self._wave.writeframes(pcm)
+        self.frames_written += len(pcm) // 2
+
+    def close(self):
+        if self._wave is not None:
+            self._wave.close()
+            self._wave = None
+
+
+class StdoutBackend:
+    """把原始PCM（S16_LE单声道）写到标准输出，可接aplay -f S16_LE -r 22050"""
+
+    name = "stdout"
+
+    def play(self, pcm, sample_rate):
+        sys.stdout.buffer.write(pcm)
+        sys.stdout.buffer.flush()
+
+    def close(self):
+        pass
+
+
+class BellBackend:
+    """没有可用音频设备时向终端输出响铃字符"""
+
+    name = "bell"
+
+    def play(self, pcm, sample_rate):
+        sys.stdout.write("\a")
+        sys.stdout.flush()
+
+    def close(self):
+        pass
+
+
+class NullBackend:
+    name = "none"
+
+    def play(self, pcm, sample_rate):
+        pass
+
+    def close(self):
+        pass
+
+
+def select_backend(spec=None):
+    """按名称选择播放后端，默认Windows用winsound，其他系统用aplay或终端响铃
+
+    spec可以是winsound、command、wav:<路径>、stdout、bell或none，
+    未指定时读取环境变量DIGIT_CLOCK_ALARM_BACKEND。
+    """
+    import platform
+    import shutil
+    spec = spec or os.environ.get("DIGIT_CLOCK_ALARM_BACKEND", "")
+    if spec.startswith("wav:"):
+        return WavFileBackend(spec[4:])
+    simple = {"command": CommandBackend, "stdout": StdoutBackend, "bell": BellBackend, "none": NullBackend}
+    if spec in simple:
+        return simple[spec]()
+    if spec == "winsound" or (not spec and platform.system() == 'Windows'):
+        try:
+            return WinsoundBackend()
+        except ImportError as e:
+            print(f"无法使用winsound播放提醒音: {e}")
+    if shutil.which("aplay"):
+        return CommandBackend()
+    return BellBackend()
+
+
+class AlarmPlayer:
+    """在后台线程播放提醒音，Tk线程只负责把播放请求放入队列
+
+    未指定backend时在工作线程中选择播放后端，不占用启动时间；
+    用warm()预先合成的模式和播放过的模式的PCM数据都会缓存；
+    stop()在当前这一遍播放完后停止后续的重复。
+    """
+
+    def __init__(self, backend=None, sample_rate=SAMPLE_RATE):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self._buffers = {}
+        self._requests = queue.Queue()
+        self._stop = threading.Event()
+        self.plays = 0
+        self._thread = threading.Thread(target=self._run, name="alarm-player", daemon=True)
+        self._thread.start()
+
+    def play(self, pattern=DEFAULT_PATTERN):
+        """请求播放一种提醒音模式，立即返回"""
+        self._stop.clear()
+        self._requests.put(("play", pattern))
+
+    def warm(self, pattern=DEFAULT_PATTERN):
+        """请求在后台预先合成一种模式的PCM数据"""
+        self._requests.put(("warm", pattern))
+
+    def stop(self):
+        """停止正在播放的提醒音（不再继续重复）"""
+        self._stop.set()
+        # 丢弃尚未开始的播放请求
+        try:
+            while True:
+                self._requests.get_nowait()
+        except queue.Empty:
+            pass
+
+    def close(self, timeout=1.0):
+        """停止播放并等待工作线程退出"""
+        self.stop()
+        self._requests.put(None)
+        self._thread.join(timeout)
+        if self.backend is not None:
+            self.backend.close()
+
+    def buffers(self, pattern):
+        if pattern not in self._buffers:
+            self._buffers[pattern] = pattern_buffers(pattern, self.sample_rate)
+        return self._buffers[pattern]
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                break
+            action, pattern = request
+            try:
+                buffers = self.buffers(pattern)
+                if action == "warm":
+                    continue
+                if self.backend is None:
+                    self.backend = select_backend()
+                for pcm in buffers:
+                    if self._stop.is_set():
+                        break
+                    self.backend.play(pcm, self.sample_rate)
+                self.plays += 1
+            except Exception as e:
+                print(f"无法播放提醒音: {e}")
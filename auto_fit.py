@@ -0,0 +1,118 @@
+import re
+from tkinter import font as tkfont
+
+from frame_renderer import LabelRenderer
+
+# 窗口尺寸变化后等待多久（毫秒）没有新的变化才重新布局
+RESIZE_DEBOUNCE_MS = 80
+
+_DIGITS = re.compile(r"\d")
+
+
+def text_pattern(text):
+    """把数字统一替换为0，同一格式的文本得到同一个布局键"""
+    return _DIGITS.sub("0", text)
+
+
+class ResizeDebouncer:
+    """合并连续的<Configure>事件，尺寸稳定后只回调一次
+
+    拖动改变窗口大小时每个像素都会产生一次<Configure>，
+    这里只在最后一次事件之后delay_ms毫秒内没有新事件时才调用callback(width, height)。
+    """
+
+    def __init__(self, widget, callback, delay_ms=RESIZE_DEBOUNCE_MS):
+        self.widget = widget
+        self.callback = callback
+        self.delay_ms = delay_ms
+        self.size = None        # 最近一次已应用的尺寸
+        self._pending = None    # 等待应用的尺寸
+        self._after_id = None
+        self._immediate = False
+        # 收到的<Configure>事件数和实际重新布局的次数
+        self.events = 0
+        self.applied = 0
+        widget.bind("<Configure>", self.on_configure, add="+")
+
+    def expect_jump(self):
+        """下一次尺寸变化立即应用（如切换全屏），不等待防抖"""
+        self._immediate = True
+
+    def on_configure(self, event):
+        self.events += 1
+        self._pending = (event.width, event.height)
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        if self._immediate:
+            self._immediate = False
+            self.apply()
+        else:
+            self._after_id = self.widget.after(self.delay_ms, self.apply)
+
+    def apply(self):
+        self._after_id = None
+        if self._pending is None or self._pending == self.size:
+            return
+        self.size = self._pending
+        self.applied += 1
+        self.callback(*self.size)
+
+
+class FittedLabelRenderer(LabelRenderer):
+    """字体显示方式下按标签尺寸自动选择字号的渲染器
+
+    用一个不显示的探测字体二分查找能放下当前文本格式的最大字号，
+    结果按(文本格式, 宽, 高)缓存，同一尺寸再次出现时不再测量。
+    """
+
+    def __init__(self, label, digit_font, padx=20, pady=10):
+        super().__init__(label)
+        self.digit_font = digit_font
+        self.padx = padx
+        self.pady = pady
+        self._probe = tkfont.Font(label, **digit_font.actual())
+        self._fits = {}
+        self._pattern = None
+        self._size = None
+        self.resizer = ResizeDebouncer(label, self.on_resize)
+
+    def render(self, text):
+        pattern = text_pattern(text)
+        if pattern != self._pattern:
+            self._pattern = pattern
+            self.refit()
+        return super().render(text)
+
+    def on_resize(self, width, height):
+        self._size = (width, height)
+        self.refit()
+
+    def refit(self):
+        # 标签尚未映射到屏幕时保持当前字号
+        if self._size is None or self._pattern is None:
+            return
+        size = self.fit_size(self._pattern, *self._size)
+        if size != self.digit_font.cget("size"):
+            self.digit_font.configure(size=size)
+
+    def fit_size(self, pattern, width, height):
+        """返回能把pattern放进width x height的最大字号（带缓存）"""
+        key = (pattern, width, height)
+        size = self._fits.get(key)
+        if size is None:
+            size = self._search(pattern, width - 2 * self.padx, height - 2 * self.pady)
+            self._fits[key] = size
+        return size
+
+    def _search(self, pattern, width, height):
+        probe = self._probe
+        lo, hi = 6, max(6, height)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            probe.configure(size=mid)
+            if probe.measure(pattern) <= width and probe.metrics("linespace") <= height:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
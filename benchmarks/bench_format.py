@@ -0,0 +1,55 @@
+"""时间格式化的微基准测试
+
+比较各种显示格式每次调用的耗时（纳秒），以及原来的divmod+f-string
+和strftime写法，不需要图形环境：
+
+    python benchmarks/bench_format.py
+"""
+import argparse
+import datetime
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time_format  # noqa: E402
+from time_format import compile_format  # noqa: E402
+
+ELAPSED_NS = 3723456789012  # 1小时2分3.45秒
+LONG_NS = 400 * 3600 * 10**9  # 超过99小时，显示天数
+
+
+def legacy_hms(ns):
+    # 原来的写法
+    hours, remainder = divmod(int(ns // 10**9), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def cases():
+    yield "divmod+f-string HH:MM:SS", lambda: legacy_hms(ELAPSED_NS)
+    yield "strftime %H:%M", lambda: datetime.datetime.now().strftime("%H:%M")
+    for name in ("CLOCK_24", "CLOCK_24_SECONDS", "CLOCK_12", "CLOCK_12_SECONDS"):
+        fmt = compile_format(getattr(time_format, name))
+        yield f"clock {fmt.pattern}", fmt.clock
+    for name in ("TIMER_SECONDS", "TIMER_TENTHS", "TIMER_HUNDREDTHS"):
+        fmt = compile_format(getattr(time_format, name))
+        yield f"duration {fmt.pattern}", lambda fmt=fmt: fmt.duration(ELAPSED_NS)
+    fmt = compile_format(time_format.TIMER_SECONDS)
+    yield "duration HH:MM:SS (>99h)", lambda: fmt.duration(LONG_NS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=100000, help="每轮调用次数")
+    parser.add_argument("--repeat", type=int, default=5, help="轮数（取最快的一轮）")
+    args = parser.parse_args(argv)
+    print(f"{'格式':<30}{'每次调用(ns)':>14}  示例")
+    for name, func in cases():
+        best = min(timeit.repeat(func, number=args.number, repeat=args.repeat))
+        print(f"{name:<30}{best / args.number * 1e9:>14.0f}  {func()}")
+
+
+if __name__ == "__main__":
+    main()
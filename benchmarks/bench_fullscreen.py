@@ -0,0 +1,63 @@
+"""切换全屏后首帧耗时的基准测试
+
+分别测量字体标签、Canvas多边形七段数码管和缓存图像七段数码管
+在窗口尺寸与全屏尺寸之间切换时，从改变尺寸到重绘完成所用的时间。
+需要图形环境，Linux下可以用Xvfb运行：
+
+    xvfb-run -s "-screen 0 1920x1080x24" python benchmarks/bench_fullscreen.py
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tkinter as tk
+from tkinter import font
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from multi_window import make_display  # noqa: E402
+
+WINDOWED = (400, 150)
+
+
+def bench_style(style, toggles):
+    root = tk.Tk()
+    root.geometry("%dx%d+0+0" % WINDOWED)
+    # 与DigitalClock和附加窗口相同配置的显示控件
+    digit_font = font.Font(root, family='DS-Digital', size=70) if style == "font" else None
+    renderer = make_display(root, style, digit_font)
+    renderer.render("12:34")
+    root.update()
+    screen = (root.winfo_screenwidth(), root.winfo_screenheight())
+    timings = []
+    for i in range(toggles):
+        fullscreen = i % 2 == 0
+        width, height = screen if fullscreen else WINDOWED
+        start = time.perf_counter()
+        # 与toggle_fullscreen相同：全屏的尺寸变化不等待防抖立即应用
+        renderer.resizer.expect_jump()
+        root.geometry("%dx%d+0+0" % (width, height))
+        # 处理Configure事件和空闲重绘，返回时新尺寸的一帧已经画完
+        root.update()
+        timings.append((time.perf_counter() - start) * 1000)
+    root.destroy()
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--toggles", type=int, default=20, help="切换次数")
+    parser.add_argument("--styles", default="font,segment,glyph", help="要测试的显示方式")
+    args = parser.parse_args(argv)
+    print(f"{'显示方式':<10}{'首次进入全屏(ms)':>18}{'之后进入全屏(ms)':>18}{'退出全屏(ms)':>14}")
+    for style in args.styles.split(","):
+        timings = bench_style(style, args.toggles)
+        enter = timings[0::2]
+        leave = timings[1::2]
+        warm = statistics.median(enter[1:]) if len(enter) > 1 else float("nan")
+        print(f"{style:<10}{enter[0]:>18.2f}{warm:>18.2f}{statistics.median(leave):>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
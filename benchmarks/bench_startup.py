@@ -0,0 +1,63 @@
+"""冷启动到第一帧画出所用时间的基准测试
+
+每次启动一个新的Python进程创建DigitalClock，测量从启动进程到第一帧
+画到屏幕上（处理完空闲重绘）的时间，并分别给出导入模块和创建窗口的耗时。
+每个进程使用单独的临时HOME目录，不读取已有的计时数据和窗口位置。
+需要图形环境，Linux下可以用Xvfb运行：
+
+    xvfb-run -s "-screen 0 1920x1080x24" python benchmarks/bench_startup.py
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在子进程中运行：输出 导入耗时 创建耗时 从启动进程到第一帧的耗时（毫秒）
+CHILD = """
+import os, sys, time
+spawned = int(os.environ["BENCH_SPAWN_NS"])
+t0 = time.perf_counter()
+import digit_clock
+t1 = time.perf_counter()
+app = digit_clock.DigitalClock()
+t2 = time.perf_counter()
+app.update()
+first_frame = (time.time_ns() - spawned) / 1e6
+app.close_window(None)
+print((t1 - t0) * 1000, (t2 - t1) * 1000, first_frame)
+"""
+
+
+def run_once(style):
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, DIGIT_CLOCK_STYLE=style,
+                   DIGIT_CLOCK_ALARM_BACKEND="none", DIGIT_CLOCK_KEEP_AWAKE="off")
+        env.pop("DIGIT_CLOCK_TICK_STATS", None)
+        # 不发布共享状态，避免改写或删除正在运行的时钟的状态文件
+        env.pop("DIGIT_CLOCK_SHM", None)
+        env["BENCH_SPAWN_NS"] = str(time.time_ns())
+        output = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=env,
+                                capture_output=True, text=True, check=True).stdout
+    return [float(v) for v in output.split()[-3:]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="每种显示方式启动的次数")
+    parser.add_argument("--styles", default="glyph,segment,font", help="要测试的显示方式")
+    args = parser.parse_args(argv)
+    print(f"{'显示方式':<10}{'导入(ms)':>10}{'创建窗口(ms)':>14}{'第一帧(ms)':>12}{'最慢第一帧(ms)':>16}")
+    for style in args.styles.split(","):
+        results = [run_once(style) for _ in range(args.runs)]
+        imports, builds, frames = zip(*results)
+        print(f"{style:<10}{statistics.median(imports):>10.1f}{statistics.median(builds):>14.1f}"
+              f"{statistics.median(frames):>12.1f}{max(frames):>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""刷新、渲染和持久化路径的基准测试套件
+
+测量以下指标，并与保存的基线比较，超过容差的变慢标记为退化：
+
+  engine_tick.<模式>      引擎计算一次刷新（显示文本和下一次刷新时间）的耗时（微秒）
+  wakeups_per_hour.<模式> 各模式每小时的刷新唤醒次数（用虚拟时钟模拟）
+  save.append_us         追加一条计时日志的耗时（微秒，不含fsync）
+  save.sync_ms           fsync一批计时日志的耗时（毫秒）
+  load.<n>_records_ms    读取快照并回放n条日志的耗时（毫秒）
+  rss.after_<n>h_mb      模拟运行n小时后的常驻内存（MB）
+  rss.growth_mb          模拟运行期间常驻内存的增长（MB）
+  tk_tick.<模式>          DigitalClock.update_time一次的耗时（微秒，需要图形环境）
+  commit.<显示方式>.<尺寸> 显示文本变化后提交到Tk并重绘的耗时（微秒，需要图形环境）
+
+整套测量重复运行几遍（--runs）后每项指标取中位数，避免一遍中偶然的整体变慢；
+容差按指标设置：耗时类指标默认允许慢50%（--threshold），唤醒次数几乎不允许变化，
+fsync耗时和内存用绝对值放宽。
+
+没有图形环境时跳过Tk相关的指标，Linux下可以用Xvfb运行全部测试：
+
+    xvfb-run -s "-screen 0 1920x1080x24" python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --save-baseline   # 把本次结果保存为基线
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from clock_engine import ClockEngine  # noqa: E402
+from clock_source import VirtualClock, NS_PER_SEC  # noqa: E402
+from time_format import compile_format, CLOCK_24, CLOCK_24_SECONDS  # noqa: E402
+from timer_journal import TimerJournal, START, PAUSE, COUNTDOWN  # noqa: E402
+from simulate_day import SimulatedClock, HOUR  # noqa: E402
+
+# 默认基线文件、耗时类指标的退化阈值（比基线慢的比例）和重复运行的遍数
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+THRESHOLD = 0.5
+RUNS = 5
+
+# 按指标名前缀设置的容差：(相对比例, 绝对值)，超过基线 * (1 + 相对比例) + 绝对值才算退化
+TOLERANCES = {
+    "wakeups_per_hour.": (0.01, 0.0),
+    "save.sync_ms": (1.0, 0.5),      # 取决于文件系统和磁盘
+    "rss.after_": (0.1, 1.0),
+    "rss.growth_mb": (0.0, 1.0),
+}
+
+MODES = ("clock", "clock_seconds", "timer", "countdown", "stopwatch")
+WINDOWED = (400, 150)
+
+
+def set_mode(engine, mode):
+    """把引擎切换到要测试的模式并开始运行"""
+    engine.switch_to_clock()
+    engine.set_precision(False)
+    if mode in ("timer", "stopwatch"):
+        engine.set_precision(mode == "stopwatch")
+        engine.start()
+    elif mode == "countdown":
+        engine.set_countdown(hours=100)
+        engine.start()
+
+
+def make_engine(mode, clock):
+    engine = ClockEngine(clock_format=CLOCK_24_SECONDS if mode == "clock_seconds" else CLOCK_24, clock=clock)
+    set_mode(engine, mode)
+    return engine
+
+
+def time_per_call(func, number, repeat=7):
+    """返回func每次调用的耗时（微秒，取最快的一轮，减少其他进程的干扰）"""
+    results = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func()
+        results.append((time.perf_counter_ns() - start) / number / 1000)
+    return min(results)
+
+
+# ---- 不需要图形环境的指标 ----
+
+def bench_engine_tick(results, number):
+    for mode in MODES:
+        clock = VirtualClock()
+        engine = make_engine(mode, clock)
+
+        def tick():
+            # 每次刷新前推进一个显示单位，使每次都产生新的文本
+            clock.advance(10_000_000 if mode == "stopwatch" else NS_PER_SEC)
+            engine.display_text()
+            engine.next_change_delay()
+        results[f"engine_tick.{mode}"] = time_per_call(tick, number)
+
+
+def bench_wakeups(results, hours):
+    for mode in MODES:
+        if mode == "stopwatch":
+            # 高精度秒表按帧率刷新，由FramePacer决定，不在这里统计
+            continue
+        clock = VirtualClock()
+        sim = SimulatedClock(clock, CLOCK_24_SECONDS if mode == "clock_seconds" else CLOCK_24)
+        set_mode(sim.engine, mode)
+        sim.refresh()
+        before = sim.widget.calls
+        sim.run(hours * HOUR)
+        results[f"wakeups_per_hour.{mode}"] = (sim.widget.calls - before) / hours
+        sim.close()
+
+
+def bench_persistence(results, number, records):
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = os.path.join(tmp, "timer.json")
+        # 与DigitalClock.save_timer_data相同：逐条追加，按批次或间隔fsync
+        journal = TimerJournal(snapshot, sync_interval=3600, sync_batch=10**9, compact_after=10**9)
+        kinds = (START, PAUSE, COUNTDOWN)
+        counter = iter(range(10**9))
+        results["save.append_us"] = time_per_call(
+            lambda: journal.append(kinds[next(counter) % 3], 123456789), number)
+        syncs = []
+        for _ in range(20):
+            for i in range(32):
+                journal.append(START, i)
+            start = time.perf_counter_ns()
+            journal.sync()
+            syncs.append((time.perf_counter_ns() - start) / 1e6)
+        results["save.sync_ms"] = statistics.median(syncs)
+        journal.close()
+        # 回放指定条数的日志（默认压缩阈值附近的最坏情况）
+        with open(journal.journal_path, "w") as f:
+            for i in range(records):
+                f.write(f"{kinds[i % 3]} {i}\n")
+        loader = TimerJournal(snapshot)
+        results[f"load.{records}_records_ms"] = time_per_call(loader.load, 20) / 1000
+        loader.close()
+
+
+def current_rss_mb():
+    """当前进程的常驻内存（MB），只支持Linux"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def bench_rss(results, hours):
+    clock = VirtualClock()
+    sim = SimulatedClock(clock, CLOCK_24_SECONDS)
+    sim.run(HOUR)
+    before = current_rss_mb()
+    if before is None:
+        return
+    # 在各模式之间切换，模拟长时间运行（高精度秒表按帧率刷新，模拟太慢，不包括在内）
+    modes = MODES[:-1]
+    for hour in range(hours):
+        set_mode(sim.engine, modes[hour % len(modes)])
+        sim.timers.add(f"t{hour % 50}", minutes=30, start=True)
+        sim.refresh()
+        sim.run(HOUR)
+    after = current_rss_mb()
+    results[f"rss.after_{hours}h_mb"] = after
+    results["rss.growth_mb"] = after - before
+    sim.close()
+
+
+# ---- 需要图形环境的指标 ----
+
+def tk_available():
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        return False
+    try:
+        import tkinter
+        tkinter.Tk().destroy()
+    except Exception:
+        return False
+    return True
+
+
+def use_temp_home(home):
+    """让DigitalClock使用临时的主目录，必须在导入digit_clock之前调用
+
+    历史数据库、窗口位置等默认路径在导入模块时按主目录确定。
+    """
+    os.environ.update(HOME=home, DIGIT_CLOCK_ALARM_BACKEND="none", DIGIT_CLOCK_KEEP_AWAKE="off",
+                      DIGIT_CLOCK_SHM=os.path.join(home, "state"))
+    for name in ("DIGIT_CLOCK_CONTROL", "DIGIT_CLOCK_METRICS", "DIGIT_CLOCK_WINDOWS", "DIGIT_CLOCK_ALARMS"):
+        os.environ.pop(name, None)
+
+
+def bench_tk_tick(results, number):
+    import digit_clock
+    clock = VirtualClock()
+    app = digit_clock.DigitalClock(clock=clock)
+    app.update()
+    for mode in MODES:
+        app.engine.clock_format = compile_format(CLOCK_24_SECONDS if mode == "clock_seconds" else CLOCK_24)
+        set_mode(app.engine, mode)
+        step = 10_000_000 if mode == "stopwatch" else NS_PER_SEC
+
+        def tick():
+            clock.advance(step)
+            app.update_time()
+            # 包括Tk处理重绘的时间
+            app.update_idletasks()
+        results[f"tk_tick.{mode}"] = time_per_call(tick, number)
+        app.pacer.stop()
+        app.scheduler.cancel()
+    app.engine.switch_to_clock()
+    app.close_window(None)
+
+
+def bench_commit(results, number):
+    import tkinter as tk
+    from tkinter import font
+    from multi_window import make_display
+    for style in ("font", "segment", "glyph"):
+        root = tk.Tk()
+        digit_font = font.Font(root, family='DS-Digital', size=70) if style == "font" else None
+        renderer = make_display(root, style, digit_font)
+        sizes = {"windowed": WINDOWED, "fullscreen": (root.winfo_screenwidth(), root.winfo_screenheight())}
+        for name, (width, height) in sizes.items():
+            renderer.resizer.expect_jump()
+            root.geometry("%dx%d+0+0" % (width, height))
+            root.update()
+            counter = iter(range(10**9))
+
+            def commit():
+                # 每次提交不同的文本（与每秒刷新一次时相同）
+                n = next(counter)
+                renderer.render(f"{n // 60 % 24:02d}:{n % 60:02d}")
+                root.update_idletasks()
+            results[f"commit.{style}.{name}"] = time_per_call(commit, number)
+        root.destroy()
+
+
+# ---- 基线比较 ----
+
+def tolerance(name, threshold):
+    """返回指标的(相对比例, 绝对值)容差"""
+    for prefix, value in TOLERANCES.items():
+        if name.startswith(prefix):
+            return value
+    return threshold, 0.0
+
+
+def run_suite(args):
+    """运行一遍全部测量，返回{指标: 值}"""
+    results = {}
+    bench_engine_tick(results, args.number)
+    bench_wakeups(results, args.hours)
+    bench_persistence(results, args.number, args.records)
+    bench_rss(results, args.rss_hours)
+    if args.tk:
+        bench_tk_tick(results, max(1, args.number // 10))
+        bench_commit(results, max(1, args.number // 10))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """打印与基线的比较，返回退化的指标列表（所有指标都是越小越好）"""
+    regressions = []
+    print(f"{'指标':<32}{'基线':>12}{'本次':>12}{'变化':>10}")
+    for name in sorted(results):
+        value = results[name]
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<32}{'-':>12}{value:>12.2f}{'无基线':>10}")
+            continue
+        change = (value - base) / base if base else 0.0
+        relative, absolute = tolerance(name, threshold)
+        flag = ""
+        if value > base * (1 + relative) + absolute:
+            flag = "  退化"
+            regressions.append(name)
+        print(f"{name:<32}{base:>12.2f}{value:>12.2f}{change * 100:>+9.1f}%{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="每轮调用次数")
+    parser.add_argument("--hours", type=int, default=12, help="统计唤醒次数时模拟运行的小时数")
+    parser.add_argument("--rss-hours", type=int, default=48, help="统计内存时模拟运行的小时数")
+    parser.add_argument("--records", type=int, default=1000, help="测试回放的日志条数")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="基线文件")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="耗时类指标判定为退化的变慢比例")
+    parser.add_argument("--runs", type=int, default=RUNS, help="重复运行的遍数，每项指标取中位数")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写入基线文件")
+    parser.add_argument("--no-tk", action="store_true", help="跳过需要图形环境的指标")
+    parser.add_argument("--json", help="把本次结果写入JSON文件")
+    args = parser.parse_args(argv)
+
+    args.tk = not args.no_tk and tk_available()
+    if not args.tk:
+        print("没有图形环境，跳过tk_tick和commit指标")
+    with tempfile.TemporaryDirectory() as home:
+        # 所有遍数共用一个临时主目录，不读写真实用户的数据
+        if args.tk:
+            use_temp_home(home)
+        runs = [run_suite(args) for _ in range(max(1, args.runs))]
+    results = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if args.save_baseline:
+        # 保留本次没有测量的指标（如在无图形环境下更新基线时的Tk指标）
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"基线已保存到{args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)}项指标超过容差: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""用虚拟时钟模拟一整天的刷新、暂停和倒计时提醒
+
+运行与DigitalClock相同的ClockController（刷新调度、到期提醒、跳变校正），
+调度接在VirtualClock上，只是不创建窗口；虚拟时间直接跳到
+下一个到期的回调，24小时在一秒左右跑完。模拟中途还会调整一次系统时间
+并挂起一次系统，检查计时是否被正确校正，不需要图形环境：
+
+    python benchmarks/simulate_day.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clock_controller import ClockController  # noqa: E402
+from clock_source import VirtualClock, VirtualAfter, NS_PER_SEC  # noqa: E402
+from keep_awake import KeepAwake, NullInhibitor  # noqa: E402
+from alarm_player import AlarmPlayer, NullBackend  # noqa: E402
+from session_history import SessionHistory  # noqa: E402
+
+HOUR = 3600
+MINUTE = 60
+
+
+class SimulatedClock(ClockController):
+    """没有窗口的DigitalClock：运行同一个ClockController，只把显示换成记录文本变化"""
+
+    def __init__(self, clock, clock_format, journal=None):
+        super().__init__(VirtualAfter(clock), clock=clock, clock_format=clock_format, journal=journal,
+                         history=SessionHistory(":memory:", clock=clock),
+                         keep_awake=KeepAwake(NullInhibitor()), alarm_player=AlarmPlayer(NullBackend()))
+        self.text = None
+        self.text_changes = 0
+        # 提醒记录：(名称, 提醒时的单调时钟纳秒)
+        self.alarms = []
+        self.update_time()
+
+    def render(self, text):
+        if text != self.text:
+            self.text = text
+            self.text_changes += 1
+
+    def alarm(self, names):
+        super().alarm(names)
+        now = self.clock.monotonic_ns()
+        self.alarms.extend((name, now) for name in names)
+
+    def log(self, message):
+        pass
+
+    def run(self, seconds):
+        self.widget.run_for(seconds)
+
+    def close(self):
+        self.alarm_player.close()
+        self.history.close()
+
+
+def simulate(clock_format):
+    """按固定剧本模拟24小时，返回(模拟对象, 检查结果列表)"""
+    clock = VirtualClock(wall_ns=1_700_000_000 * NS_PER_SEC)
+    sim = SimulatedClock(clock, clock_format)
+    engine = sim.engine
+    checks = []
+
+    # 0-2小时：时钟模式
+    sim.run(2 * HOUR)
+    # 2小时：正向计时30分钟，暂停10分钟，再计时15分钟
+    engine.start()
+    sim.refresh()
+    sim.run(30 * MINUTE)
+    engine.pause()
+    sim.refresh()
+    sim.run(10 * MINUTE)
+    engine.start()
+    sim.refresh()
+    sim.run(15 * MINUTE)
+    checks.append(("正向计时45分钟", engine.timer_elapsed_ns() == 45 * MINUTE * NS_PER_SEC))
+    engine.switch_to_clock()
+    sim.refresh()
+    # 每小时一个25分钟的命名倒计时
+    for hour in range(3, 11):
+        sim.timers.add(f"hour{hour}", minutes=25, start=True)
+        sim.refresh()
+        sim.run(HOUR)
+    checks.append(("命名倒计时按时提醒", len(sim.alarms) == 8))
+    # 11小时：系统时间向回调整30秒（NTP校时），计时不受影响
+    engine.set_countdown(minutes=40)
+    engine.start()
+    sim.refresh()
+    sim.run(10 * MINUTE)
+    clock.step_wall(-30 * NS_PER_SEC)
+    sim.run(30 * MINUTE)
+    checks.append(("校时后倒计时按单调时钟到期", sim.alarms[-1][0] == "countdown"))
+    # 18小时：倒计时运行中系统挂起20分钟，恢复后剩余时间扣除挂起的时间
+    engine.switch_to_clock()
+    sim.refresh()
+    sim.run(7 * HOUR - 40 * MINUTE)
+    engine.set_countdown(minutes=30)
+    engine.start()
+    sim.refresh()
+    sim.run(5 * MINUTE)
+    clock.suspend(20 * MINUTE * NS_PER_SEC)
+    sim.run(1)
+    remaining = engine.countdown_remaining_ns()
+    checks.append(("挂起后倒计时剩余约5分钟", abs(remaining - 5 * MINUTE * NS_PER_SEC) < 2 * NS_PER_SEC))
+    sim.run(6 * MINUTE)
+    checks.append(("挂起后倒计时提前提醒", engine.countdown_expired))
+    # 剩余时间回到时钟模式
+    engine.switch_to_clock()
+    sim.refresh()
+    sim.run(24 * HOUR - clock.monotonic_ns() // NS_PER_SEC)
+    checks.append(("检测到1次校时和1次挂起", sim.jumps.wall_jumps == 1 and sim.jumps.suspends == 1))
+    # 两次倒计时到期都按虚拟时间记入历史汇总
+    checks.append(("历史记录按虚拟时间汇总", sim.history.week_total() == 70 * MINUTE * NS_PER_SEC))
+    return sim, checks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clock-format", default="HH:MM:SS", help="时钟模式的显示格式")
+    args = parser.parse_args(argv)
+    t0 = time.perf_counter()
+    sim, checks = simulate(args.clock_format)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    print(f"模拟时长: {sim.clock.monotonic_ns() / NS_PER_SEC / HOUR:.1f}小时，实际用时: {elapsed_ms:.1f}ms")
+    print(f"回调: {sim.widget.calls}次，显示变化: {sim.text_changes}次，提醒: {len(sim.alarms)}次")
+    print(sim.jumps.report())
+    sim.close()
+    failed = 0
+    for name, ok in checks:
+        print(f"  {'通过' if ok else '失败'}  {name}")
+        failed += not ok
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
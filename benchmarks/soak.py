@@ -0,0 +1,235 @@
+"""长时间运行的内存增长测试（soak）
+
+用虚拟时钟加速刷新，按剧本反复切换模式、记录分圈、设置和到期倒计时、
+调整系统时间和挂起系统，模拟连续运行多天；第一天作为预热，之后定期用
+tracemalloc拍快照，最后按代码位置列出内存增长最多的地方，保留的内存增长
+超过上限时以非零状态退出。
+
+默认只运行与Tk无关的引擎、命名倒计时、调度器和计时日志；加--tk运行完整的
+DigitalClock，并且每个模拟小时打开/关闭一次倒计时设置对话框、切换两次全屏
+（需要图形环境，Linux下可以用Xvfb运行）：
+
+    python benchmarks/soak.py --days 30
+    xvfb-run -s "-screen 0 1920x1080x24" python benchmarks/soak.py --tk --days 3
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import timer_journal  # noqa: E402
+from clock_source import VirtualClock, NS_PER_SEC  # noqa: E402
+from simulate_day import SimulatedClock, HOUR, MINUTE  # noqa: E402
+from time_format import CLOCK_24  # noqa: E402
+
+# 保留内存增长的默认上限（KB）
+GROWTH_BOUND_KB = 256
+
+# 快照中不计入的分配：tracemalloc自身和模块导入
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def take_snapshot():
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+
+class HeadlessSoak:
+    """只运行引擎、命名倒计时、调度器和计时日志"""
+
+    def __init__(self, home):
+        self.clock = VirtualClock()
+        self.sim = SimulatedClock(self.clock, CLOCK_24)
+        self.journal = timer_journal.TimerJournal(os.path.join(home, "timer.json"))
+        self.alarms = 0
+
+    def hour(self, n):
+        """运行一个模拟小时的剧本"""
+        sim, engine, journal = self.sim, self.sim.engine, self.journal
+        # 正向计时，中途记分圈、暂停，最后重置
+        engine.switch_to_timer()
+        engine.start()
+        journal.append(timer_journal.START, engine.timer_accumulated_ns)
+        sim.refresh()
+        for _ in range(10):
+            sim.run(MINUTE)
+            engine.lap()
+        engine.pause()
+        journal.append(timer_journal.PAUSE, engine.timer_accumulated_ns)
+        sim.refresh()
+        sim.run(5 * MINUTE)
+        engine.reset_timer()
+        journal.append(timer_journal.RESET)
+        # 倒计时到期提醒
+        engine.set_countdown(minutes=15)
+        journal.append(timer_journal.COUNTDOWN, engine.countdown_ns)
+        engine.start()
+        sim.refresh()
+        sim.run(16 * MINUTE)
+        # 命名倒计时：添加、到期和取消
+        sim.timers.add(f"soak{n % 20}", minutes=7, start=True)
+        sim.timers.add("cancelled", minutes=30, start=True)
+        sim.timers.cancel("cancelled")
+        engine.switch_to_clock()
+        journal.append(timer_journal.MODE, "clock")
+        sim.refresh()
+        sim.run(20 * MINUTE)
+        # 高精度秒表按帧率刷新，只运行几秒
+        engine.set_precision(True)
+        engine.start()
+        sim.refresh()
+        sim.run(3)
+        engine.reset_timer()
+        engine.set_precision(False)
+        engine.switch_to_clock()
+        sim.refresh()
+        if n % 24 == 5:
+            self.clock.step_wall(-30 * NS_PER_SEC)
+        if n % 24 == 17:
+            self.clock.suspend(10 * MINUTE * NS_PER_SEC)
+        sim.run(HOUR - 51 * MINUTE - 3)
+        # 模拟对象的提醒记录只用于检查，清空后不计入增长
+        self.alarms += len(sim.alarms)
+        del sim.alarms[:]
+
+    def close(self):
+        self.journal.close()
+        self.sim.close()
+        print(f"提醒: {self.alarms}次")
+
+
+class TkSoak:
+    """运行完整的DigitalClock，刷新时刻按虚拟时钟推进"""
+
+    def __init__(self, home):
+        os.environ.update(HOME=home, DIGIT_CLOCK_ALARM_BACKEND="none", DIGIT_CLOCK_KEEP_AWAKE="off",
+                          DIGIT_CLOCK_SHM=os.path.join(home, "state"))
+        os.environ.pop("DIGIT_CLOCK_CONTROL", None)
+        os.environ.pop("DIGIT_CLOCK_METRICS", None)
+        import digit_clock
+        self.clock = VirtualClock()
+        self.app = digit_clock.DigitalClock(clock=self.clock)
+        self.app.update()
+        self._dialogs = 0
+        self._toggles = 0
+
+    def run(self, seconds):
+        """按显示变化时刻推进虚拟时钟并刷新，代替Tk的after调度"""
+        app, clock = self.app, self.clock
+        end = clock.monotonic_ns() + seconds * NS_PER_SEC
+        ticks = 0
+        while clock.monotonic_ns() < end:
+            delay_ns = int(app.engine.next_change_delay() * NS_PER_SEC)
+            clock.advance(max(1, min(delay_ns, end - clock.monotonic_ns())))
+            if app.engine.countdown_deadline is not None and app.engine.countdown_remaining_ns() == 0:
+                app.on_countdown_expired()
+            app.update_time()
+            ticks += 1
+            if ticks % 100 == 0:
+                app.update()
+        app.update()
+
+    def close_dialog(self):
+        # 轮流按"确定"和"取消"关闭倒计时设置对话框
+        self._dialogs += 1
+        for child in self.app.winfo_children():
+            if child.winfo_class() == "Toplevel" and child.title() == "设置倒计时":
+                if self._dialogs % 2:
+                    for widget in child.winfo_children():
+                        for button in widget.winfo_children():
+                            if button.winfo_class() == "Button" and button.cget("text") == "确定":
+                                button.invoke()
+                                return
+                child.destroy()
+
+    def hour(self, n):
+        app = self.app
+        app.on_t_press()
+        app.on_space_press()
+        for _ in range(10):
+            self.run(MINUTE)
+            app.on_l_press()
+        app.on_space_press()
+        self.run(5 * MINUTE)
+        app.on_r_press()
+        app.on_c_press()
+        # 打开设置对话框，稍后自动关闭（对话框是模态的，等待期间Tk照常处理事件）
+        app.after(50, self.close_dialog)
+        app.on_d_press()
+        if app.engine.mode == "countdown":
+            app.on_space_press()
+            self.run(6 * MINUTE)
+            app.on_c_press()
+        for _ in range(2):
+            app.toggle_fullscreen()
+            app.update()
+            self._toggles += 1
+        app.on_p_press()
+        app.on_t_press()
+        app.on_space_press()
+        self.run(2)
+        app.on_r_press()
+        app.on_p_press()
+        app.on_c_press()
+        self.run(HOUR - 21 * MINUTE - 2)
+
+    def close(self):
+        print(f"提醒: {self.app.alarms_raised}次，对话框: {self._dialogs}次，全屏切换: {self._toggles}次")
+        self.app.close_window(None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=float, default=7, help="模拟运行的天数（不含第一天的预热）")
+    parser.add_argument("--tk", action="store_true", help="运行完整的DigitalClock（需要图形环境）")
+    parser.add_argument("--snapshot-hours", type=int, default=24, help="每隔多少模拟小时拍一次快照")
+    parser.add_argument("--bound-kb", type=float, default=GROWTH_BOUND_KB, help="允许的保留内存增长（KB）")
+    parser.add_argument("--top", type=int, default=10, help="列出增长最多的代码位置数")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as home:
+        soak = TkSoak(home) if args.tk else HeadlessSoak(home)
+        # 第一天预热：填满各种缓存后再开始测量
+        for n in range(24):
+            soak.hour(n)
+        tracemalloc.start()
+        baseline = take_snapshot()
+        base_size = sum(stat.size for stat in baseline.statistics("filename"))
+        hours = int(args.days * 24)
+        print(f"{'模拟小时':>8}{'保留内存增长(KB)':>18}")
+        for n in range(24, 24 + hours):
+            soak.hour(n)
+            if (n - 23) % args.snapshot_hours == 0 or n == 23 + hours:
+                snapshot = take_snapshot()
+                size = sum(stat.size for stat in snapshot.statistics("filename"))
+                print(f"{n - 23:>8}{(size - base_size) / 1024:>18.1f}")
+        growth = (size - base_size) / 1024
+        print(f"\n增长最多的代码位置（模拟{hours}小时，实际用时{time.perf_counter() - started:.1f}s）:")
+        for stat in snapshot.compare_to(baseline, "lineno")[:args.top]:
+            if stat.size_diff <= 0:
+                break
+            frame = stat.traceback[0]
+            print(f"  {stat.size_diff / 1024:>8.1f} KB  {stat.count_diff:>+7}个  "
+                  f"{os.path.relpath(frame.filename)}:{frame.lineno}")
+        tracemalloc.stop()
+        soak.close()
+    if growth > args.bound_kb:
+        print(f"失败：保留内存增长{growth:.1f}KB，超过上限{args.bound_kb:g}KB")
+        sys.exit(1)
+    print(f"通过：保留内存增长{growth:.1f}KB（上限{args.bound_kb:g}KB）")
+
+
+if __name__ == "__main__":
+    main()
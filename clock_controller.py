@@ -0,0 +1,388 @@
+import time
+
+from clock_engine import ClockEngine
+from clock_source import SYSTEM_CLOCK, JumpDetector, NS_PER_SEC
+from timer_manager import TimerManager
+import timer_journal
+from keep_awake import KeepAwake
+from alarm_player import AlarmPlayer, DEFAULT_PATTERN
+from tick_scheduler import TickScheduler, DeadlineTimer, FramePacer, DEFAULT_FPS
+from instrumentation import Histogram, DURATION_BUCKETS_MS
+
+
+class ClockController:
+    """与Tk无关的时钟控制逻辑：刷新调度、到期提醒、时间跳变校正、按键和控制命令
+
+    widget只需提供after/after_cancel（Tk窗口，或clock_source.VirtualAfter）。
+    DigitalClock在此基础上创建窗口并实现render()显示文本；
+    benchmarks/simulate_day.py接在虚拟时钟上运行同一套逻辑，不需要图形环境。
+    journal、history为None时不保存计时数据和历史记录。
+    """
+
+    def __init__(self, widget, clock=SYSTEM_CLOCK, clock_format=None, timer_format=None,
+                 journal=None, history=None, keep_awake=None, alarm_player=None,
+                 alarm_pattern=DEFAULT_PATTERN, fps=DEFAULT_FPS):
+        self.widget = widget
+        self.clock = clock
+        # 每次刷新检查墙上时间跳变（NTP校时）和系统挂起
+        self.jumps = JumpDetector(clock)
+        engine_formats = {}
+        if clock_format is not None:
+            engine_formats["clock_format"] = clock_format
+        if timer_format is not None:
+            engine_formats["timer_format"] = timer_format
+        # 计时状态全部由引擎保存
+        self.engine = ClockEngine(clock=clock, **engine_formats)
+        # 命名倒计时（可同时运行多个），只在最早到期时刻唤醒
+        self.timers = TimerManager(clock)
+        self.journal = journal
+        self._journal_flush_id = None
+        self.history = history
+        self.keep_awake = keep_awake or KeepAwake()
+        # 提醒音在后台线程播放，不阻塞刷新
+        self.alarm_player = alarm_player or AlarmPlayer()
+        self.alarm_pattern = alarm_pattern
+        # 按显示变化边界调度刷新
+        self.scheduler = TickScheduler(widget, self.update_time, clock)
+        # 高精度秒表运行时按显示帧率刷新，暂停后回到按变化边界刷新
+        self.pacer = FramePacer(widget, self.update_time, fps=fps, clock=clock)
+        # 倒计时到期的单次定时器
+        self.deadline_timer = DeadlineTimer(widget, self.on_countdown_expired, clock)
+        self.timers_deadline_timer = DeadlineTimer(widget, self.on_timers_expired, clock)
+        # 按本地时间重复的定时提醒，只在最早的触发时刻唤醒
+        self.scheduled = None
+        self.scheduled_deadline_timer = DeadlineTimer(widget, self.on_scheduled_alarm, clock)
+        # 本地控制服务（由DigitalClock启动），执行一批命令时合并刷新
+        self.control = None
+        self._draining = False
+        self._refresh_pending = False
+        # 常开的运行指标：刷新、保存、提醒的耗时分布（毫秒）和计数
+        self.tick_duration = Histogram(DURATION_BUCKETS_MS)
+        self.save_duration = Histogram(DURATION_BUCKETS_MS)
+        self.alarm_duration = Histogram(DURATION_BUCKETS_MS)
+        self.alarms_raised = 0
+        self.sessions_recorded = 0
+
+    # ---- 由使用者实现 ----
+
+    def render(self, text):
+        """显示一次刷新的文本"""
+
+    def next_tick_delay(self):
+        """返回到下一次需要刷新的时间（秒）"""
+        return self.engine.next_change_delay()
+
+    def log(self, message):
+        print(message)
+
+    # ---- 刷新 ----
+
+    def update_time(self):
+        started = time.perf_counter_ns()
+        wall_jump_ns, suspended_ns = self.jumps.check()
+        if wall_jump_ns or suspended_ns:
+            self.on_clock_jump(wall_jump_ns, suspended_ns)
+        # 先执行控制服务收到的命令，再根据引擎状态更新显示
+        if self.control is not None and not self._draining and not self.control.commands.empty():
+            self.drain_control()
+        self.render(self.engine.display_text())
+        # 帧循环运行时由它调度下一帧，否则在显示内容下一次变化时刷新
+        if not self.pacer.running:
+            self.scheduler.schedule(self.next_tick_delay())
+        self.tick_duration.observe((time.perf_counter_ns() - started) / 1e6)
+
+    def refresh(self):
+        # 引擎状态改变后：同步倒计时到期定时器，立即刷新并重新调度
+        if self._draining:
+            # 执行一批控制命令时只在最后刷新一次
+            self._refresh_pending = True
+            return
+        deadline = self.engine.countdown_deadline
+        if deadline is None:
+            self.deadline_timer.cancel()
+        elif deadline != self.deadline_timer.deadline_ns:
+            self.deadline_timer.arm(deadline)
+        self.sync_timers()
+        self.keep_awake.update(self.timing_active())
+        if self.engine.stopwatch_running:
+            self.scheduler.cancel()
+            if not self.pacer.running:
+                self.pacer.start()
+                return
+        else:
+            self.pacer.stop()
+        self.scheduler.kick()
+
+    def on_clock_jump(self, wall_jump_ns, suspended_ns):
+        # 墙上时间跳变只影响时钟模式的显示，本次刷新会按新的时间重新对齐；
+        # 系统挂起时单调时钟停止，运行中的计时补上挂起的时间，挂起期间到期的倒计时立即提醒
+        if wall_jump_ns:
+            self.log(f"系统时间调整了{wall_jump_ns / NS_PER_SEC:+.1f}秒")
+        if suspended_ns:
+            self.log(f"系统挂起了{suspended_ns / NS_PER_SEC:.1f}秒，已校正计时")
+            self.engine.resume_after_suspend(suspended_ns)
+            self.timers.resume_after_suspend(suspended_ns)
+            if self.engine.countdown_deadline is not None:
+                self.deadline_timer.arm(self.engine.countdown_deadline)
+            self.sync_timers()
+        if self.scheduled is not None:
+            if wall_jump_ns < 0:
+                # 时间向回调整：刚触发过的规则可能在调整后的时间里再次出现
+                self.scheduled.rebase()
+            # 墙上时间与单调时钟的对应关系变了，重新设置唤醒时刻（向前调整错过的提醒立即补发）
+            self.sync_scheduled()
+
+    # ---- 到期和提醒 ----
+
+    def sync_timers(self):
+        # 命名倒计时改变后（添加、暂停、取消）重新设置最早到期时刻
+        deadline = self.timers.next_deadline()
+        if deadline is None:
+            self.timers_deadline_timer.cancel()
+        elif deadline != self.timers_deadline_timer.deadline_ns:
+            self.timers_deadline_timer.arm(deadline)
+
+    def on_countdown_expired(self):
+        # 倒计时到期：由deadline_timer在到期时刻调用
+        if self.engine.expire_countdown():
+            self.record_session("countdown", self.engine.countdown_total_ns or self.engine.countdown_ns)
+            self.refresh()
+            self.alarm(("countdown",))
+
+    def timing_active(self):
+        # 主倒计时/秒表或任一命名倒计时在运行时保持屏幕唤醒
+        return self.engine.timer_running or self.timers.running_count > 0
+
+    def on_timers_expired(self):
+        # 命名倒计时到期：一次取出所有已到期的倒计时
+        expired = self.timers.pop_expired()
+        self.sync_timers()
+        self.keep_awake.update(self.timing_active())
+        if expired:
+            self.log(f"倒计时结束: {', '.join(expired)}")
+            self.alarm(expired)
+
+    def sync_scheduled(self):
+        # 把最早的定时提醒时刻（墙上时间）换算为单调时钟时刻设置唤醒
+        fire_ns = self.scheduled.next_fire_ns()
+        if fire_ns is None:
+            self.scheduled_deadline_timer.cancel()
+        else:
+            self.scheduled_deadline_timer.arm(self.clock.monotonic_ns() + fire_ns - self.clock.wall_ns())
+
+    def on_scheduled_alarm(self):
+        # 定时提醒到时：取出所有已到时刻的规则，各自计算下一次触发时刻
+        due = self.scheduled.pop_due()
+        self.sync_scheduled()
+        if due:
+            self.log(f"定时提醒: {', '.join(due)}")
+            self.alarm(due)
+
+    def load_scheduled_alarms(self, spec):
+        """加载定时提醒规则"""
+        from scheduled_alarms import AlarmSchedule, parse_alarm_specs
+        self.scheduled = AlarmSchedule(self.clock)
+        try:
+            for name, rule in parse_alarm_specs(spec):
+                self.scheduled.add(name, rule)
+        except (OSError, ValueError) as e:
+            self.log(f"加载定时提醒失败: {e}")
+        self.sync_scheduled()
+
+    def alarm(self, names):
+        # 提醒（names为到期的倒计时或定时提醒名称）：放入播放队列后立即返回，时钟继续刷新
+        started = time.perf_counter_ns()
+        self.alarm_player.play(self.alarm_pattern)
+        self.alarm_duration.observe((time.perf_counter_ns() - started) / 1e6)
+        self.alarms_raised += 1
+
+    # ---- 保存 ----
+
+    def save_timer_data(self, kind, value=""):
+        """向计时日志追加一条记录"""
+        if self.journal is None:
+            return
+        started = time.perf_counter_ns()
+        self.journal.append(kind, value)
+        self.save_duration.observe((time.perf_counter_ns() - started) / 1e6)
+        # 未达到fsync批次的记录在稍后统一写入磁盘
+        if self.journal.pending and self._journal_flush_id is None:
+            delay_ms = int(self.journal.sync_interval * 1000)
+            self._journal_flush_id = self.widget.after(delay_ms, self.flush_timer_data)
+
+    def flush_timer_data(self):
+        """把尚未写入磁盘的计时日志记录fsync"""
+        if self._journal_flush_id is not None:
+            self.widget.after_cancel(self._journal_flush_id)
+            self._journal_flush_id = None
+        try:
+            self.journal.sync()
+        except Exception as e:
+            self.log(f"保存计时数据失败: {e}")
+
+    def record_session(self, kind, duration_ns):
+        """把一次完成的计时写入历史记录"""
+        if self.history is None:
+            return
+        try:
+            self.history.record(kind, duration_ns)
+            self.sessions_recorded += 1
+        except Exception as e:
+            self.log(f"保存计时历史失败: {e}")
+
+    def load_saved_timer_data(self):
+        """在初始化时加载并应用保存的计时数据"""
+        data = self.journal.load()
+        self.engine.timer_accumulated_ns = data["timer_accumulated_ns"]
+        self.engine.countdown_ns = data["countdown_ns"]
+        # 如果保存的模式是计时模式，自动切换到计时模式并显示保存的时间
+        if data["mode"] == "timer" and self.engine.timer_accumulated_ns > 0:
+            self.engine.switch_to_timer()
+        elif data["mode"] == "countdown" and self.engine.countdown_ns > 0:
+            self.engine.mode = "countdown"
+
+    # ---- 按键操作 ----
+
+    def on_space_press(self, event=None):
+        # 空格键：开始/暂停当前模式的计时（从时钟模式按空格，默认开始正向计时）
+        # 同时停止正在播放的提醒音
+        self.alarm_player.stop()
+        self.engine.toggle()
+        # 记录开始/暂停事件
+        if self.engine.mode == "timer":
+            kind = timer_journal.START if self.engine.timer_running else timer_journal.PAUSE
+            self.save_timer_data(kind, self.engine.timer_accumulated_ns)
+        elif not self.engine.timer_running:
+            self.save_timer_data(timer_journal.COUNTDOWN, self.engine.countdown_ns)
+        self.refresh()
+
+    def on_r_press(self, event=None):
+        # R键：重置当前模式的计时，同时停止正在播放的提醒音
+        self.alarm_player.stop()
+        if self.engine.mode == "timer":
+            # 记录本次计时并记录重置事件
+            self.record_session("timer", self.engine.timer_elapsed_ns())
+            self.save_timer_data(timer_journal.RESET)
+        self.engine.reset()
+        self.refresh()
+
+    def on_c_press(self, event=None):
+        # C键：切换回时钟模式
+        self.engine.switch_to_clock()
+        self.save_timer_data(timer_journal.MODE, "clock")
+        self.refresh()
+
+    def on_t_press(self, event=None):
+        # T键：切换到正向计时模式（停止计时但保留累计时间）
+        if self.engine.mode != "timer":
+            self.engine.switch_to_timer()
+            self.save_timer_data(timer_journal.MODE, "timer")
+        self.refresh()
+
+    def on_l_press(self, event=None):
+        # L键：正向计时运行时记录一圈，显示最近一圈的用时
+        if self.engine.lap() is not None:
+            self.refresh()
+
+    def on_p_press(self, event=None):
+        # P键：切换高精度秒表（正向计时显示百分之一秒并按显示帧率刷新）
+        self.engine.set_precision(not self.engine.precision)
+        self.refresh()
+
+    def set_countdown(self, hours, minutes, seconds):
+        # 设置倒计时并记录
+        self.engine.set_countdown(hours=hours, minutes=minutes, seconds=seconds)
+        self.save_timer_data(timer_journal.COUNTDOWN, self.engine.countdown_ns)
+        self.refresh()
+
+    # ---- 控制命令 ----
+
+    def drain_control(self):
+        # 执行一批控制命令，批内的状态变化合并为一次刷新，
+        # 计时日志的fsync和历史记录的写入也在批次结束后各做一次
+        self._draining = True
+        if self.journal is not None:
+            self.journal.batching = True
+        if self.history is not None:
+            self.history.batching = True
+        try:
+            self.control.drain(self.handle_control)
+        finally:
+            self._draining = False
+            if self.journal is not None:
+                self.journal.batching = False
+                if self.journal.pending:
+                    self.flush_timer_data()
+            if self.history is not None:
+                self.history.batching = False
+                try:
+                    self.history.flush()
+                except Exception as e:
+                    self.log(f"保存计时历史失败: {e}")
+        if self._refresh_pending:
+            self._refresh_pending = False
+            self.refresh()
+
+    def handle_control(self, command):
+        """执行一条控制命令，返回回复字典"""
+        cmd = command["cmd"]
+        engine = self.engine
+        if cmd == "start":
+            if not engine.timer_running:
+                self.on_space_press()
+        elif cmd == "pause":
+            if engine.timer_running:
+                self.on_space_press()
+        elif cmd == "toggle":
+            self.on_space_press()
+        elif cmd == "reset":
+            self.on_r_press()
+        elif cmd == "lap":
+            self.on_l_press()
+        elif cmd == "clock":
+            self.on_c_press()
+        elif cmd == "timer":
+            self.on_t_press()
+        elif cmd == "countdown":
+            hours, minutes, seconds = (int(command.get(k, 0)) for k in ("hours", "minutes", "seconds"))
+            if min(hours, minutes, seconds) < 0 or hours + minutes + seconds == 0:
+                return {"ok": False, "error": "请至少设置一个非零时间，且不能为负数"}
+            self.set_countdown(hours, minutes, seconds)
+        elif cmd.startswith("named_") or cmd == "expiring":
+            return self.handle_named_timer(command)
+        state = engine.snapshot()._asdict()
+        state["text"] = engine.display_text()
+        state["laps"] = len(engine.laps)
+        return {"ok": True, "state": state}
+
+    def handle_named_timer(self, command):
+        """执行命名倒计时的控制命令：named_add、named_toggle、named_cancel、named_list、expiring"""
+        cmd, timers = command["cmd"], self.timers
+        if cmd == "expiring":
+            within = timers.expiring_within(float(command.get("seconds", 60)))
+            return {"ok": True, "expiring": [{"name": name, "remaining_ns": ns} for name, ns in within]}
+        if cmd != "named_list":
+            name = command.get("name")
+            if not isinstance(name, str) or not name:
+                return {"ok": False, "error": "需要参数name"}
+            if cmd == "named_add":
+                hours, minutes, seconds = (int(command.get(k, 0)) for k in ("hours", "minutes", "seconds"))
+                if min(hours, minutes, seconds) < 0 or hours + minutes + seconds == 0:
+                    return {"ok": False, "error": "请至少设置一个非零时间，且不能为负数"}
+                start = command.get("start", True)
+                if not isinstance(start, bool):
+                    return {"ok": False, "error": "参数start应为true或false"}
+                timers.add(name, hours, minutes, seconds, start=start)
+            elif name not in timers:
+                return {"ok": False, "error": f"没有名为{name}的倒计时"}
+            elif cmd == "named_toggle":
+                timers.toggle_countdown(name)
+            elif cmd == "named_cancel":
+                timers.cancel(name)
+            # 重新设置最早到期时刻，附加窗口同时刷新
+            self.refresh()
+        now = self.clock.monotonic_ns()
+        return {"ok": True, "timers": [
+            {"name": t.name, "remaining_ns": t.remaining_ns(now), "running": t.running, "expired": t.expired}
+            for t in timers
+        ]}
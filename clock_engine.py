@@ -0,0 +1,236 @@
+from collections import namedtuple
+
+from clock_source import SYSTEM_CLOCK, NS_PER_SEC
+from tick_scheduler import seconds_to_boundary, IDLE_TICK
+from lap_recorder import LapRecorder
+from time_format import compile_format, CLOCK_24, TIMER_SECONDS, TIMER_HUNDREDTHS
+
+# 引擎状态快照
+EngineSnapshot = namedtuple(
+    "EngineSnapshot", ["mode", "running", "elapsed_ns", "remaining_ns", "expired"]
+)
+
+
+class ClockEngine:
+    """与Tk无关的计时核心，保存时钟/正向计时/倒计时的全部状态
+
+    clock_format为时钟模式的显示格式，timer_format为正向计时和倒计时的显示格式，
+    格式写法见time_format.py（如"hh:MMAP"、"HH:MM:SS.cc"）。
+    clock为时钟来源（见clock_source.py），传入VirtualClock可以在不等待的情况下模拟计时。
+    """
+
+    def __init__(self, clock_format=CLOCK_24, timer_format=TIMER_SECONDS,
+                 precision_format=TIMER_HUNDREDTHS, clock=SYSTEM_CLOCK):
+        self.mode = "clock"  # clock, timer, countdown
+        self.clock = clock
+        # 编译后的显示格式
+        self.clock_format = compile_format(clock_format)
+        self.timer_format = compile_format(timer_format)
+        # 高精度秒表：正向计时显示百分之一秒，并改用clock.precise_ns计时
+        self.precision = False
+        self.precision_format = compile_format(precision_format)
+        self._timer_clock = clock.monotonic_ns
+        self.timer_running = False
+        # 正向计时（纳秒，clock.monotonic_ns）
+        self.timer_start_ns = None
+        self.timer_accumulated_ns = 0
+        # 正向计时的分圈记录
+        self.laps = LapRecorder()
+        # 倒计时剩余时间（纳秒），运行时为最近一次开始时的剩余时间
+        self.countdown_ns = 0
+        # 最近一次设置的倒计时总时长（纳秒），用于记录历史
+        self.countdown_total_ns = 0
+        # 倒计时到期时刻（clock.monotonic_ns），未运行时为None
+        self.countdown_deadline = None
+        # 倒计时是否已到期（到期后显示00:00:00，直到重新开始或重置）
+        self.countdown_expired = False
+
+    # ---- 通用操作 ----
+
+    def start(self):
+        """开始当前模式的计时，时钟模式下开始正向计时"""
+        if not self.timer_running:
+            self.toggle()
+
+    def pause(self):
+        """暂停当前模式的计时"""
+        if self.timer_running:
+            self.toggle()
+
+    def toggle(self):
+        """开始/暂停当前模式的计时（空格键语义）"""
+        if self.mode == "countdown":
+            self.toggle_countdown()
+        else:
+            # 时钟模式下默认开始正向计时
+            self.toggle_timer()
+
+    def reset(self):
+        """重置当前模式的计时"""
+        if self.mode == "timer":
+            self.reset_timer()
+        elif self.mode == "countdown":
+            self.reset_countdown()
+
+    def switch_to_clock(self):
+        # 切换回时钟模式
+        self.mode = "clock"
+        self.timer_running = False
+        self.countdown_deadline = None
+
+    def switch_to_timer(self):
+        # 切换到正向计时模式，停止计时但保留累计时间
+        if self.mode != "timer":
+            self.mode = "timer"
+            self.timer_running = False
+            self.timer_start_ns = None
+            self.countdown_deadline = None
+
+    # ---- 正向计时 ----
+
+    def timer_elapsed_ns(self):
+        # 正向计时已经过的时间（纳秒）
+        if self.timer_running and self.timer_start_ns is not None:
+            return self.timer_accumulated_ns + self._timer_clock() - self.timer_start_ns
+        return self.timer_accumulated_ns
+
+    def toggle_timer(self):
+        # 切换计时状态（开始/暂停）
+        if not self.timer_running:
+            # 如果是时钟模式切换到计时模式，从0开始计时
+            if self.mode == "clock":
+                self.mode = "timer"
+                self.timer_accumulated_ns = 0
+                self.laps.clear()
+            self.timer_running = True
+            self.timer_start_ns = self._timer_clock()
+        else:
+            # 暂停计时，累计已计时时间
+            self.timer_accumulated_ns = self.timer_elapsed_ns()
+            self.timer_running = False
+            self.timer_start_ns = None
+
+    def reset_timer(self):
+        # 重置计时，同时清空分圈记录
+        self.timer_running = False
+        self.timer_accumulated_ns = 0
+        self.timer_start_ns = None
+        self.laps.clear()
+
+    def lap(self):
+        """正向计时运行时记一圈，返回本圈用时，不在计时时返回None"""
+        if self.mode != "timer" or not self.timer_running:
+            return None
+        return self.laps.mark(self.timer_elapsed_ns())
+
+    def set_precision(self, enabled):
+        """切换高精度秒表，运行中切换时保持已经过的时间不变"""
+        if enabled == self.precision:
+            return
+        running_ns = None
+        if self.timer_running and self.timer_start_ns is not None:
+            running_ns = self._timer_clock() - self.timer_start_ns
+        self.precision = enabled
+        self._timer_clock = self.clock.precise_ns if enabled else self.clock.monotonic_ns
+        if running_ns is not None:
+            self.timer_start_ns = self._timer_clock() - running_ns
+
+    @property
+    def stopwatch_running(self):
+        """高精度秒表是否正在运行（需要按显示帧率刷新）"""
+        return self.precision and self.mode == "timer" and self.timer_running
+
+    # ---- 倒计时 ----
+
+    def countdown_remaining_ns(self):
+        # 倒计时剩余时间（纳秒）
+        if self.countdown_expired:
+            return 0
+        if self.countdown_deadline is None:
+            return self.countdown_ns
+        return max(0, self.countdown_deadline - self.clock.monotonic_ns())
+
+    def set_countdown(self, hours=0, minutes=0, seconds=0):
+        # 设置倒计时时间并切换到倒计时模式
+        self.countdown_ns = (hours * 3600 + minutes * 60 + seconds) * NS_PER_SEC
+        self.countdown_total_ns = self.countdown_ns
+        self.mode = "countdown"
+        self.timer_running = False
+        self.countdown_deadline = None
+        self.countdown_expired = False
+
+    def toggle_countdown(self):
+        # 切换倒计时状态（开始/暂停）
+        if not self.timer_running:
+            self.timer_running = True
+            self.mode = "countdown"
+            self.countdown_expired = False
+            self.countdown_deadline = self.clock.monotonic_ns() + self.countdown_ns
+        else:
+            # 暂停倒计时，以整数纳秒保存剩余时间
+            self.timer_running = False
+            if self.countdown_deadline is not None:
+                self.countdown_ns = self.countdown_remaining_ns()
+                self.countdown_deadline = None
+
+    def reset_countdown(self):
+        # 重置倒计时，恢复到最近一次开始时的剩余时间
+        self.timer_running = False
+        self.countdown_deadline = None
+        self.countdown_expired = False
+
+    def expire_countdown(self):
+        """倒计时到期，返回是否需要提醒"""
+        if self.countdown_deadline is None:
+            return False
+        self.timer_running = False
+        self.countdown_deadline = None
+        self.countdown_expired = True
+        return True
+
+    def resume_after_suspend(self, suspended_ns):
+        """系统挂起了suspended_ns纳秒：单调时钟不包含这段时间，运行中的计时需要补上"""
+        if self.timer_running and self.timer_start_ns is not None:
+            self.timer_start_ns -= suspended_ns
+        if self.countdown_deadline is not None:
+            # 提前到期时刻，挂起期间已经到期的倒计时会立即提醒
+            self.countdown_deadline -= suspended_ns
+
+    # ---- 显示 ----
+
+    def snapshot(self):
+        """返回当前状态快照"""
+        return EngineSnapshot(
+            self.mode,
+            self.timer_running,
+            self.timer_elapsed_ns(),
+            self.countdown_remaining_ns(),
+            self.countdown_expired,
+        )
+
+    def display_text(self):
+        """返回当前模式应显示的文本"""
+        if self.mode == "timer":
+            fmt = self.precision_format if self.precision else self.timer_format
+            text = fmt.duration(self.timer_elapsed_ns())
+            if self.laps:
+                # 在主时间后面显示最近一圈的用时
+                text += " L" + fmt.duration(self.laps.last_lap_ns)
+            return text
+        if self.mode == "countdown":
+            return self.timer_format.duration(self.countdown_remaining_ns())
+        return self.clock_format.clock(self.clock.wall_ns())
+
+    def next_change_delay(self):
+        """返回到下一次显示变化的时间（秒）"""
+        if self.mode == "clock":
+            # 按显示格式的最小单位刷新（如只显示到分钟时在下一个整分钟刷新）
+            return seconds_to_boundary(self.clock.wall_ns() / NS_PER_SEC, self.clock_format.resolution_ns / NS_PER_SEC)
+        if self.mode == "timer" and self.timer_running:
+            fmt = self.precision_format if self.precision else self.timer_format
+            step = fmt.resolution_ns
+            return (step - self.timer_elapsed_ns() % step) / NS_PER_SEC
+        if self.mode == "countdown" and self.countdown_deadline is not None:
+            return (self.countdown_remaining_ns() % self.timer_format.resolution_ns) / NS_PER_SEC
+        # 暂停状态显示不变，按键操作会立即刷新
+        return IDLE_TICK
@@ -0,0 +1,174 @@
+import heapq
+import itertools
+import time
+
+NS_PER_SEC = 1_000_000_000
+NS_PER_MS = 1_000_000
+
+# 墙上时间与单调时钟的走时差超过这个值（纳秒）时认为发生了跳变
+JUMP_THRESHOLD_NS = 2 * NS_PER_SEC
+
+_CLOCK_BOOTTIME = getattr(time, "CLOCK_BOOTTIME", None)
+
+
+class SystemClock:
+    """真实时钟
+
+    wall_ns为墙上时间（time.time_ns），monotonic_ns为单调时钟，precise_ns为高精度计时，
+    boot_ns为包含系统挂起时间的单调时钟（只有Linux提供，其他系统为None）。
+    """
+
+    def wall_ns(self):
+        return time.time_ns()
+
+    def monotonic_ns(self):
+        return time.monotonic_ns()
+
+    def precise_ns(self):
+        return time.perf_counter_ns()
+
+    if _CLOCK_BOOTTIME is not None:
+        def boot_ns(self):
+            return time.clock_gettime_ns(_CLOCK_BOOTTIME)
+    else:
+        boot_ns = None
+
+
+# 默认使用的真实时钟
+SYSTEM_CLOCK = SystemClock()
+
+
+class VirtualClock:
+    """可以用程序推进的虚拟时钟，用于快速、可重复的模拟和测试
+
+    advance()让所有时间一起前进；step_wall()只改变墙上时间（模拟NTP校时）；
+    suspend()模拟系统挂起：墙上时间和boot_ns前进，单调时钟不动。
+    """
+
+    def __init__(self, wall_ns=None, monotonic_ns=0):
+        self._wall = time.time_ns() if wall_ns is None else wall_ns
+        self._monotonic = monotonic_ns
+        self._boot = monotonic_ns
+
+    def wall_ns(self):
+        return self._wall
+
+    def monotonic_ns(self):
+        return self._monotonic
+
+    def precise_ns(self):
+        return self._monotonic
+
+    def boot_ns(self):
+        return self._boot
+
+    def advance(self, ns):
+        self._wall += ns
+        self._monotonic += ns
+        self._boot += ns
+
+    def step_wall(self, ns):
+        self._wall += ns
+
+    def suspend(self, ns):
+        self._wall += ns
+        self._boot += ns
+
+
+class VirtualAfter:
+    """提供Tk的after/after_cancel/after_idle接口，按虚拟时钟执行回调
+
+    替代窗口控件交给TickScheduler、DeadlineTimer等使用，run_for()把虚拟时钟
+    直接推进到下一个到期的回调，不真正等待。
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self._queue = []  # (到期时刻, 序号, after_id)
+        self._callbacks = {}
+        self._ids = itertools.count(1)
+        # 执行的回调数
+        self.calls = 0
+
+    def after(self, ms, func=None, *args):
+        seq = next(self._ids)
+        after_id = f"after#{seq}"
+        due = self.clock.monotonic_ns() + int(ms) * NS_PER_MS
+        self._callbacks[after_id] = (func, args)
+        heapq.heappush(self._queue, (due, seq, after_id))
+        return after_id
+
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+
+    def after_cancel(self, after_id):
+        # 延迟删除：出堆时跳过
+        self._callbacks.pop(after_id, None)
+
+    def pending(self):
+        return len(self._callbacks)
+
+    def run_for(self, seconds):
+        """按虚拟时间运行seconds秒，返回执行的回调数"""
+        end = self.clock.monotonic_ns() + int(seconds * NS_PER_SEC)
+        calls = 0
+        while self._queue and self._queue[0][0] <= end:
+            due, _, after_id = heapq.heappop(self._queue)
+            callback = self._callbacks.pop(after_id, None)
+            if callback is None:
+                continue
+            now = self.clock.monotonic_ns()
+            if due > now:
+                self.clock.advance(due - now)
+            func, args = callback
+            func(*args)
+            calls += 1
+        now = self.clock.monotonic_ns()
+        if end > now:
+            self.clock.advance(end - now)
+        self.calls += calls
+        return calls
+
+
+class JumpDetector:
+    """检测墙上时间跳变和系统挂起
+
+    每次check()比较上次以来墙上时间、单调时钟和boot_ns各自走过的时间：
+    墙上时间与boot_ns（没有boot_ns时为单调时钟）走时不同说明墙上时间被调整；
+    boot_ns比单调时钟多走的时间就是系统挂起的时间，此时单调时钟计时需要补上。
+    """
+
+    def __init__(self, clock=SYSTEM_CLOCK, threshold_ns=JUMP_THRESHOLD_NS):
+        self.clock = clock
+        self.threshold_ns = threshold_ns
+        self._boot = clock.boot_ns if getattr(clock, "boot_ns", None) is not None else None
+        self._last = self._sample()
+        # 检测到的次数
+        self.wall_jumps = 0
+        self.suspends = 0
+
+    def _sample(self):
+        clock = self.clock
+        return clock.wall_ns(), clock.monotonic_ns(), self._boot() if self._boot else None
+
+    def check(self):
+        """返回(墙上时间跳变量, 挂起时长)，单位纳秒，未超过阈值的部分为0"""
+        wall, mono, boot = self._sample()
+        last_wall, last_mono, last_boot = self._last
+        self._last = (wall, mono, boot)
+        d_mono = mono - last_mono
+        d_boot = boot - last_boot if boot is not None else d_mono
+        suspended = d_boot - d_mono
+        if suspended < self.threshold_ns:
+            suspended = 0
+        else:
+            self.suspends += 1
+        wall_jump = (wall - last_wall) - d_boot
+        if abs(wall_jump) < self.threshold_ns:
+            wall_jump = 0
+        else:
+            self.wall_jumps += 1
+        return wall_jump, suspended
+
+    def report(self):
+        return f"墙上时间跳变: {self.wall_jumps}次，系统挂起: {self.suspends}次"
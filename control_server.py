@@ -0,0 +1,280 @@
+import asyncio
+import json
+import os
+import queue
+import sys
+import threading
+
+# 未指定地址时的Unix套接字路径和回环TCP端口
+DEFAULT_SOCKET = os.path.join(os.path.expanduser("~"), ".digital_clock.sock")
+DEFAULT_PORT = 47650
+LOCALHOST = "127.0.0.1"
+
+# 没有文件事件时（Windows）Tk线程检查命令队列的间隔
+CONTROL_POLL_MS = 20
+# Tk线程每次最多处理的命令数，避免大量命令时画面停顿
+DRAIN_LIMIT = 500
+
+# 可用的命令
+COMMANDS = ("state", "start", "pause", "toggle", "reset", "lap", "clock", "timer", "countdown", "ping",
+            "named_add", "named_toggle", "named_cancel", "named_list", "expiring")
+
+
+def parse_address(spec):
+    """解析地址：unix:<路径>、tcp:<主机>:<端口>或tcp:<端口>，返回("unix", 路径)或("tcp", (主机, 端口))"""
+    if not spec or spec in ("1", "unix"):
+        if hasattr(asyncio, "start_unix_server") and sys.platform != "win32":
+            return "unix", DEFAULT_SOCKET
+        return "tcp", (LOCALHOST, DEFAULT_PORT)
+    if spec.startswith("unix:"):
+        return "unix", spec[5:]
+    if spec.startswith("tcp:"):
+        host, _, port = spec[4:].rpartition(":")
+        return "tcp", (host or LOCALHOST, int(port or DEFAULT_PORT))
+    raise ValueError(f"无法识别的控制地址: {spec}")
+
+
+def parse_command(line):
+    """解析一行JSON命令，返回命令字典"""
+    command = json.loads(line)
+    if not isinstance(command, dict) or command.get("cmd") not in COMMANDS:
+        raise ValueError("命令格式为{\"cmd\": 命令名, ...}，命令名为" + "、".join(COMMANDS))
+    return command
+
+
+class ControlServer:
+    """本地控制服务：在后台线程运行asyncio服务器，接收按行分隔的JSON命令
+
+    网络读写都在后台线程完成，命令放入线程安全的队列，由Tk线程调用drain()
+    一次取出多条执行，结果再交回后台线程写给客户端。同一连接可以连续发送多条命令，
+    回复按发送顺序逐行返回。Unix下用管道配合Tk的文件事件在有新命令时唤醒Tk线程，
+    没有命令时不产生任何定时唤醒。
+    """
+
+    def __init__(self, address=None):
+        self.kind, self.address = parse_address(address)
+        self.commands = queue.SimpleQueue()
+        self.clients = 0
+        # 统计：收到的命令数、执行的命令数、Tk线程处理批次数
+        self.received = 0
+        self.executed = 0
+        self.batches = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+        # 唤醒Tk线程的管道（队列由空变为非空时写入一个字节），Windows的Tk不支持文件事件
+        self._wake_r = self._wake_w = None
+        if sys.platform != "win32":
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_r, False)
+            os.set_blocking(self._wake_w, False)
+        self._wake_pending = False
+
+    @property
+    def wake_fd(self):
+        """有新命令时变为可读的文件描述符"""
+        return self._wake_r
+
+    def start(self):
+        """启动后台线程并等待开始监听，返回实际监听的地址"""
+        self._thread = threading.Thread(target=self._run, name="control-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        return self.address
+
+    def stop(self):
+        """停止服务并等待后台线程退出"""
+        if self._loop is not None and self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(1.0)
+        if self.kind == "unix":
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+        for fd in (self._wake_r, self._wake_w):
+            if fd is not None:
+                os.close(fd)
+        self._wake_r = self._wake_w = None
+
+    def drain(self, handler, limit=DRAIN_LIMIT):
+        """在Tk线程中执行队列里的命令，handler(命令字典)返回回复字典"""
+        if self._wake_r is not None:
+            try:
+                os.read(self._wake_r, 4096)
+            except BlockingIOError:
+                pass
+        self._wake_pending = False
+        results = []
+        for _ in range(limit):
+            try:
+                command, future = self.commands.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                reply = handler(command)
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+            if "id" in command:
+                reply["id"] = command["id"]
+            results.append((future, reply))
+        if results:
+            self.executed += len(results)
+            self.batches += 1
+            # 一批结果只跨线程通知一次
+            self._loop.call_soon_threadsafe(self._deliver, results)
+        if not self.commands.empty():
+            # 超过单次上限的命令留到下一次处理
+            self._wake()
+        return len(results)
+
+    def report(self):
+        return (f"控制命令: 收到{self.received}条，执行{self.executed}条，"
+                f"分{self.batches}批处理，当前连接{self.clients}个")
+
+    # ---- 后台线程 ----
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._listen())
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            self._loop.close()
+
+    async def _listen(self):
+        if self.kind == "unix":
+            if os.path.exists(self.address):
+                # 上次异常退出留下的套接字文件
+                os.unlink(self.address)
+            self._server = await asyncio.start_unix_server(self._handle, self.address)
+            os.chmod(self.address, 0o600)
+        else:
+            host, port = self.address
+            self._server = await asyncio.start_server(self._handle, host, port)
+            self.address = self._server.sockets[0].getsockname()[:2]
+
+    def _wake(self):
+        if not self._wake_pending and self._wake_w is not None:
+            self._wake_pending = True
+            try:
+                os.write(self._wake_w, b"\0")
+            except BlockingIOError:
+                pass
+
+    @staticmethod
+    def _deliver(results):
+        for future, reply in results:
+            if not future.done():
+                future.set_result(reply)
+
+    async def _handle(self, reader, writer):
+        self.clients += 1
+        replies = asyncio.Queue()
+        sender = asyncio.ensure_future(self._send_replies(replies, writer))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                self.received += 1
+                future = self._loop.create_future()
+                try:
+                    command = parse_command(line)
+                except ValueError as e:
+                    future.set_result({"ok": False, "error": str(e)})
+                else:
+                    if command["cmd"] == "ping":
+                        # 不需要访问计时状态的命令直接在后台线程回复
+                        reply = {"ok": True}
+                        if "id" in command:
+                            reply["id"] = command["id"]
+                        future.set_result(reply)
+                    else:
+                        self.commands.put((command, future))
+                        self._wake()
+                await replies.put(future)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            await replies.put(None)
+            await sender
+            self.clients -= 1
+            writer.close()
+
+    @staticmethod
+    async def _send_replies(replies, writer):
+        # 按命令顺序写回复，已经完成的回复合并后一次写出
+        while True:
+            future = await replies.get()
+            if future is None:
+                break
+            try:
+                reply = await future
+                writer.write((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+                if replies.empty():
+                    await writer.drain()
+            except ConnectionError:
+                break
+
+
+def send_commands(commands, address=None):
+    """连接控制服务，依次发送命令并返回回复列表（供脚本使用）"""
+    import socket
+    kind, addr = parse_address(address)
+    if kind == "unix":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    with sock:
+        sock.connect(addr)
+        payload = "".join(json.dumps(c, ensure_ascii=False) + "\n" for c in commands)
+        sock.sendall(payload.encode("utf-8"))
+        replies = []
+        with sock.makefile("r", encoding="utf-8") as f:
+            for _ in commands:
+                replies.append(json.loads(f.readline()))
+        return replies
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="向运行中的数码管时钟发送控制命令")
+    parser.add_argument("--address", default=os.environ.get("DIGIT_CLOCK_CONTROL"),
+                        help="控制地址，如unix:/tmp/clock.sock或tcp:127.0.0.1:47650")
+    parser.add_argument("cmd", choices=COMMANDS)
+    parser.add_argument("--hours", type=int, default=0)
+    parser.add_argument("--minutes", type=int, default=0)
+    parser.add_argument("--seconds", type=int, default=0)
+    parser.add_argument("--name", help="命名倒计时的名称（named_*命令）")
+    parser.add_argument("--paused", action="store_true", help="named_add时只添加不开始")
+    parser.add_argument("--within", type=float, default=60, help="expiring查询的时间范围（秒）")
+    args = parser.parse_args(argv)
+    command = {"cmd": args.cmd}
+    if args.cmd in ("countdown", "named_add"):
+        command.update(hours=args.hours, minutes=args.minutes, seconds=args.seconds)
+    if args.cmd.startswith("named_") and args.cmd != "named_list":
+        command["name"] = args.name
+    if args.cmd == "named_add":
+        command["start"] = not args.paused
+    if args.cmd == "expiring":
+        command["seconds"] = args.within
+    for reply in send_commands([command], args.address):
+        print(json.dumps(reply, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
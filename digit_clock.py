@@ -1,43 +1,70 @@
 import tkinter as tk
 from tkinter import font
-from tkinter import simpledialog, messagebox  # 用于创建输入对话框和显示消息
 import time
-import datetime
-import platform
-import winsound  # 用于Windows系统的声音提醒
-import json  # 用于数据持久化存储
 import os  # 用于文件路径操作
+import time_format
+from auto_fit import FittedLabelRenderer
+from segment_display import SegmentDisplay
+from glyph_cache import GlyphDisplay, GlyphCache
+from window_drag import DragCoalescer, load_window_position, save_window_position
+from timer_journal import TimerJournal
+from session_history import SessionHistory
+from alarm_player import DEFAULT_PATTERN
+from tick_scheduler import DEFAULT_FPS
+from clock_source import SYSTEM_CLOCK
+from clock_controller import ClockController
+from instrumentation import Metrics, METRICS_INTERVAL_MS, parse_metrics_target
 
-# 尝试导入ctypes用于调用系统API
-use_ctype = False
-try:
-    import ctypes
-    use_ctype = platform.system() == 'Windows'
-except ImportError:
-    pass
+# 未安装DS-Digital字体时使用的系统等宽字体
+FALLBACK_FONT = ('Courier', 'bold')
 
-# 定义常量
-if use_ctype:
-    # 定义Windows API常量
-    ES_CONTINUOUS = 0x80000000
-    ES_SYSTEM_REQUIRED = 0x00000001
-    ES_DISPLAY_REQUIRED = 0x00000002
+# 系统字体列表，只查询一次
+_font_families = None
 
-class DigitalClock(tk.Tk):
-    def __init__(self):
-        super().__init__()
+
+def has_font_family(root, family):
+    """检查字体是否已安装（font.families()的结果会缓存）"""
+    global _font_families
+    if _font_families is None:
+        _font_families = frozenset(font.families(root))
+    return family in _font_families
+
+
+class DigitalClock(ClockController, tk.Tk):
+    def __init__(self, font_family='DS-Digital', font_weight='normal', style=None, clock=None):
+        tk.Tk.__init__(self)
         self.title("数码管时钟")
+        # 所有模式和调度共用的时钟来源（见clock_source.py），默认为系统时钟
+        clock = clock or SYSTEM_CLOCK
         # 计时数据存储文件路径
         self.timer_data_file = os.path.join(os.path.expanduser("~"), ".digital_clock_timer.json")
+        # 刷新调度、到期提醒、跳变校正和计时状态由ClockController管理（见clock_controller.py），
+        # 窗口只负责显示和输入；追加式计时日志定期压缩为上面的快照文件
+        # 显示格式可用环境变量设置，如DIGIT_CLOCK_CLOCK_FORMAT=hh:MM:SSAP（12小时制带秒）、
+        # DIGIT_CLOCK_TIMER_FORMAT=HH:MM:SS.t（显示十分之一秒）；
+        # DIGIT_CLOCK_FPS设置高精度秒表的目标帧率，DIGIT_CLOCK_ALARM_PATTERN选择提醒音（beep、repeat、escalate）；
+        # 防止系统自动息屏只在状态变化时获取/释放，DIGIT_CLOCK_KEEP_AWAKE可设为always（默认）、running（只在计时时）或off
+        ClockController.__init__(
+            self, self, clock=clock,
+            clock_format=os.environ.get("DIGIT_CLOCK_CLOCK_FORMAT", time_format.CLOCK_24),
+            timer_format=os.environ.get("DIGIT_CLOCK_TIMER_FORMAT", time_format.TIMER_SECONDS),
+            journal=TimerJournal(self.timer_data_file),
+            # 已完成计时的历史记录，数据库在第一次记录时才打开
+            history=SessionHistory(clock=clock),
+            alarm_pattern=os.environ.get("DIGIT_CLOCK_ALARM_PATTERN", DEFAULT_PATTERN),
+            fps=int(os.environ.get("DIGIT_CLOCK_FPS", DEFAULT_FPS)),
+        )
         # 窗口设置为无边框
         self.overrideredirect(True)
         # 设置窗口始终在最前面
         self.attributes('-topmost', True)
         # 设置窗口背景为透明
         self.attributes('-alpha', 0.95)
-        # 窗口可以拖动
+        # 窗口可以拖动，拖动事件合并后每帧最多移动一次，松开时保存位置
+        self.drag = DragCoalescer(self, on_moved=save_window_position)
         self.bind("<Button-1>", self.start_move)
         self.bind("<B1-Motion>", self.on_move)
+        self.bind("<ButtonRelease-1>", self.end_move)
         # 右键点击关闭窗口
         self.bind("<Button-3>", self.close_window)
         # F11键切换全屏/窗口模式 - 使用bind_all确保能接收事件
@@ -58,99 +85,190 @@ class DigitalClock(tk.Tk):
         self.bind_all("T", self.on_t_press)            # T键：切换到正向计时模式
         self.bind_all("d", self.on_d_press)            # d键：切换到倒计时模式
         self.bind_all("D", self.on_d_press)            # D键：切换到倒计时模式
+        self.bind_all("l", self.on_l_press)            # l键：记录分圈
+        self.bind_all("L", self.on_l_press)            # L键：记录分圈
+        self.bind_all("e", self.on_e_press)            # e键：导出分圈记录
+        self.bind_all("E", self.on_e_press)            # E键：导出分圈记录
+        self.bind_all("p", self.on_p_press)            # p键：切换高精度秒表
+        self.bind_all("P", self.on_p_press)            # P键：切换高精度秒表
+        self.bind_all("i", self.on_i_press)            # i键：显示/隐藏运行指标
+        self.bind_all("I", self.on_i_press)            # I键：显示/隐藏运行指标
         
-        # 计时功能相关变量
-        self.mode = "clock"  # clock, timer, countdown
-        self.timer_running = False
-        self.timer_start_time = None
-        self.timer_paused_time = 0
-        self.timer_accumulated = 0
-        self.countdown_time = 0  # 倒计时总时间（秒）
-        self.countdown_start = None
+        # 设置窗口大小，恢复上次关闭时的位置
+        position = load_window_position()
+        if position:
+            self.geometry("400x150+%d+%d" % position)
+        else:
+            self.geometry("400x150")
+        
+        # 显示方式：glyph为缓存图像拼出的七段数码管（默认），segment为Canvas多边形绘制的七段数码管，
+        # 两者都不依赖字体；font为数码管字体
+        self.display_style = style or os.environ.get("DIGIT_CLOCK_STYLE", "glyph")
+        self.glyph_cache = None
+        if self.display_style == "font":
+            # 创建窗口内容前检查字体，缺少时直接换用系统字体，不再重新创建整个程序
+            if not has_font_family(self, font_family):
+                print(f"警告: 未安装{font_family}字体，将使用系统默认字体继续...")
+                font_family, font_weight = FALLBACK_FONT
+            # 创建数码管字体
+            self.digit_font = font.Font(family=font_family, size=70, weight=font_weight)
+            
+            # 创建时间显示标签
+            self.time_label = tk.Label(
+                self,
+                font=self.digit_font,
+                bg='#000000',
+                fg='#00FF00',  # 绿色数码管效果
+                bd=0,
+                padx=20,
+                pady=10
+            )
+            self.time_label.pack(fill=tk.BOTH, expand=True)
+            # 只在显示文本变化时更新标签，字号随标签大小自动调整
+            self.renderer = FittedLabelRenderer(self.time_label, self.digit_font, padx=20, pady=10)
+            self.display_widget = self.time_label
+        else:
+            # 七段数码管随窗口大小自动缩放，每次刷新只修改变化的段
+            self.digit_font = None
+            if self.display_style == "segment":
+                self.renderer = SegmentDisplay(self, fg='#00FF00', bg='#000000')
+            else:
+                # 各尺寸的数字图像按LRU缓存，切换全屏后再切回时直接复用
+                # 附加窗口也使用同一个缓存
+                self.glyph_cache = GlyphCache(self)
+                self.renderer = GlyphDisplay(self, fg='#00FF00', bg='#000000', cache=self.glyph_cache)
+            self.renderer.pack(fill=tk.BOTH, expand=True)
+            self.display_widget = self.renderer
+        # 记录切换全屏后显示第一帧所用的时间
+        self._fullscreen_t0 = None
+        self.fullscreen_frame_ms = None
+        self.display_widget.bind("<Configure>", self.on_display_configure, add="+")
         
-        # 设置窗口大小
-        self.geometry("400x150")
+        # 设置DIGIT_CLOCK_SHM时每次刷新把状态发布到共享内存，供其他进程读取
+        # （设为1使用每个用户的默认文件，或设为文件路径）
+        self.publisher = None
+        if os.environ.get("DIGIT_CLOCK_SHM", "off") != "off":
+            from state_publisher import StatePublisher, state_path
+            try:
+                self.publisher = StatePublisher(state_path(os.environ["DIGIT_CLOCK_SHM"]))
+            except Exception as e:
+                print(f"无法创建共享状态文件: {e}")
         
-        # 创建数码管字体
-        self.digit_font = font.Font(family='DS-Digital', size=70, weight='normal')
+        # 同一进程中的附加窗口（DIGIT_CLOCK_WINDOWS配置），与主窗口共用一次刷新
+        self.windows = None
         
-        # 创建时间显示标签
-        self.time_label = tk.Label(
-            self,
-            font=self.digit_font,
-            bg='#000000',
-            fg='#00FF00',  # 绿色数码管效果
-            bd=0,
-            padx=20,
-            pady=10
-        )
-        self.time_label.pack(fill=tk.BOTH, expand=True)
+        # 常开的运行指标（Prometheus格式），输出时才读取各组件的计数器
+        self.metrics = self.build_metrics()
+        self.metrics_server = None
+        self.metrics_file = None
+        self._metrics_dump_id = None
+        # 按I键显示的指标浮层
+        self.overlay = None
         
         # 加载计时数据
         self.load_saved_timer_data()
         # 更新时间
         self.update_time()
-    
-    def update_time(self):
-        # 根据当前模式更新显示
-        if self.mode == "clock":
-            # 时钟模式
-            current_time = datetime.datetime.now().strftime("%H:%M")
-            self.time_label.config(text=current_time)
-        elif self.mode == "timer":
-            # 正向计时模式
-            if self.timer_running:
-                # 计算经过的时间
-                elapsed = time.time() - self.timer_start_time + self.timer_accumulated
-                hours, remainder = divmod(int(elapsed), 3600)
-                minutes, seconds = divmod(remainder, 60)
-                timer_display = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                self.time_label.config(text=timer_display)
-        elif self.mode == "countdown":
-            # 倒计时模式
-            if self.countdown_start is not None:
-                elapsed = time.time() - self.countdown_start
-                remaining = max(0, self.countdown_time - elapsed)
-                hours, remainder = divmod(int(remaining), 3600)
-                minutes, seconds = divmod(remainder, 60)
-                countdown_display = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                self.time_label.config(text=countdown_display)
-                # 检查倒计时是否结束
-                if remaining <= 0 and self.timer_running:
-                    self.timer_running = False
-                    self.time_label.config(text="00:00:00")
-                    # 调用闹钟提醒功能
-                    self.alarm()
-        
-        # 防止系统自动息屏：通过Windows API保持系统活动
-        if use_ctype:
-            # 使用Windows API设置系统保持活动状态
-            # 这是防止系统休眠和显示器关闭的最可靠方法
-            ctypes.windll.kernel32.SetThreadExecutionState(
-                ES_CONTINUOUS | ES_SYSTEM_REQUIRED | ES_DISPLAY_REQUIRED
-            )
-        else:
-            # 备用方法：通过生成鼠标移动事件尝试重置系统活动计时器
-            self.event_generate("<Motion>")
+        # 第一帧画出后再获取保持唤醒和预先合成提醒音，不占用启动时间
+        self.after_idle(lambda: self.keep_awake.update(self.timing_active()))
+        self.after(1000, self.alarm_player.warm, self.alarm_pattern)
         
-        # 每1000毫秒更新一次
-        self.after(1000, self.update_time)
+        # 设置环境变量DIGIT_CLOCK_CONTROL时启动本地控制服务，命令在刷新时成批执行（如unix:/tmp/clock.sock、tcp:47650，设为1使用默认地址）
+        if os.environ.get("DIGIT_CLOCK_CONTROL"):
+            self.start_control_server(os.environ["DIGIT_CLOCK_CONTROL"])
+        if os.environ.get("DIGIT_CLOCK_WINDOWS"):
+            self.open_clock_windows(os.environ["DIGIT_CLOCK_WINDOWS"])
+        # 设置环境变量DIGIT_CLOCK_ALARMS时加载定时提醒，如"wake=07:30 mon-fri;standup=0 10 * * 1-5"，
+        # 或"@文件路径"（每行一条）
+        if os.environ.get("DIGIT_CLOCK_ALARMS"):
+            self.load_scheduled_alarms(os.environ["DIGIT_CLOCK_ALARMS"])
+        # 设置环境变量DIGIT_CLOCK_METRICS时输出Prometheus格式的指标（文件路径，或tcp:<端口>在回环端口提供）
+        if os.environ.get("DIGIT_CLOCK_METRICS"):
+            self.start_metrics_export(os.environ["DIGIT_CLOCK_METRICS"])
+    
+    def render(self, text):
+        # 每次刷新：更新主窗口，每种显示内容只计算一次，分发给所有附加窗口
+        self.renderer.render(text)
+        if self.windows:
+            self.windows.render(text)
+        if self.publisher is not None:
+            self.publisher.publish(self.engine, text)
+        if self.overlay is not None and not self.pacer.running:
+            # 显示指标时每秒刷新一次（高精度秒表运行时不更新）
+            self.overlay.configure(text=self.overlay_text())
+    
+    def next_tick_delay(self):
+        # 在主窗口或附加窗口的显示内容下一次变化时刷新
+        delay = self.engine.next_change_delay()
+        if self.windows:
+            delay = min(delay, self.windows.next_change_delay())
+        if self.overlay is not None:
+            delay = min(delay, 1.0)
+        return delay
     
     def start_move(self, event):
-        self.x = event.x
-        self.y = event.y
+        self.drag.start(event)
     
     def on_move(self, event):
-        x = self.winfo_pointerx() - self.x
-        y = self.winfo_pointery() - self.y
-        self.geometry(f"+{x}+{y}")
+        self.drag.motion(event)
+    
+    def end_move(self, event):
+        self.drag.finish(event)
     
     def close_window(self, event):
         # 右键点击关闭窗口
+        # 设置环境变量DIGIT_CLOCK_TICK_STATS=1时输出刷新延迟和帧提交统计
+        if os.environ.get("DIGIT_CLOCK_TICK_STATS"):
+            print(self.scheduler.report())
+            print(self.pacer.report())
+            print(self.renderer.report())
+            print(self.drag.report())
+            print(self.keep_awake.report())
+            print(self.jumps.report())
+            if self.control is not None:
+                print(self.control.report())
+            if self.windows:
+                print(self.windows.report())
+            if self.scheduled is not None:
+                print(self.scheduled.report())
+        if self.control is not None:
+            if self.control.wake_fd is not None and hasattr(self.tk, "createfilehandler"):
+                self.tk.deletefilehandler(self.control.wake_fd)
+            self.control.stop()
+        if self.publisher is not None:
+            self.publisher.close()
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+        if self.metrics_file is not None:
+            if self._metrics_dump_id is not None:
+                self.after_cancel(self._metrics_dump_id)
+            try:
+                self.metrics.dump(self.metrics_file)
+            except OSError as e:
+                print(f"写入运行指标失败: {e}")
+        self.alarm_player.close()
+        self.keep_awake.close()
+        self.journal.close()
+        if self.history is not None:
+            self.history.close()
         self.destroy()
     
+    def on_display_configure(self, event):
+        # 切换全屏后显示区域尺寸变化，在重绘完成后（空闲时）记录耗时
+        if self._fullscreen_t0 is not None:
+            self.after_idle(self.measure_fullscreen_frame)
+    
+    def measure_fullscreen_frame(self):
+        if self._fullscreen_t0 is None:
+            return
+        self.fullscreen_frame_ms = (time.perf_counter() - self._fullscreen_t0) * 1000
+        self._fullscreen_t0 = None
+        if os.environ.get("DIGIT_CLOCK_TICK_STATS"):
+            print(f"切换全屏后首帧耗时: {self.fullscreen_frame_ms:.1f}ms")
+    
     def toggle_fullscreen(self, event=None):
         # 切换全屏/窗口模式
+        self._fullscreen_t0 = time.perf_counter()
         self.fullscreen = not self.fullscreen
         
         if self.fullscreen:
@@ -161,192 +279,21 @@ class DigitalClock(tk.Tk):
             self.overrideredirect(False)
             # 进入全屏模式
             self.attributes('-fullscreen', True)
-            # 调整字体大小以适应屏幕
-            screen_width = self.winfo_screenwidth()
-            screen_height = self.winfo_screenheight()
-            font_size = int(screen_height * 0.3)  # 全屏时字体大小为屏幕高度的30%
-            self.digit_font.configure(size=font_size)
+            # 数字大小随显示区域自动调整，全屏的尺寸变化不等待防抖立即应用
+            self.renderer.resizer.expect_jump()
         else:
             # 退出全屏模式
             self.attributes('-fullscreen', False)
             # 恢复原来的窗口大小和位置
             self.geometry(self.old_geometry)
-            # 恢复原来的字体大小
-            self.digit_font.configure(size=70)
+            # 数字大小随恢复的窗口尺寸自动调整
+            self.renderer.resizer.expect_jump()
             # 恢复overrideredirect属性
             self.overrideredirect(self.old_overrideredirect)
     
-    def toggle_timer(self):
-        # 切换计时状态（开始/暂停）
-        if not self.timer_running:
-            # 开始计时
-            self.timer_running = True
-            self.timer_start_time = time.time()
-            # 如果是时钟模式切换到计时模式
-            if self.mode == "clock":
-                self.mode = "timer"
-                # 重置计时显示
-                self.timer_accumulated = 0
-                self.time_label.config(text="00:00:00")
-        else:
-            # 暂停计时
-            self.timer_running = False
-            # 累计已计时时间
-            self.timer_accumulated += time.time() - self.timer_start_time
-            self.timer_start_time = None
-            # 保存计时数据
-            self.save_timer_data()
-    
-    def reset_timer(self):
-        # 重置计时
-        self.timer_running = False
-        self.timer_accumulated = 0
-        self.timer_start_time = None
-        self.timer_paused_time = 0
-        # 如果当前是计时模式，显示0
-        if self.mode == "timer":
-            self.time_label.config(text="00:00:00")
-    
-    def save_timer_data(self):
-        """保存计时数据到文件"""
-        try:
-            data = {
-                "timer_accumulated": self.timer_accumulated,
-                "mode": self.mode
-            }
-            with open(self.timer_data_file, 'w') as f:
-                json.dump(data, f)
-        except Exception as e:
-            print(f"保存计时数据失败: {e}")
-    
-    def load_timer_data(self):
-        """从文件加载计时数据"""
-        try:
-            if os.path.exists(self.timer_data_file):
-                with open(self.timer_data_file, 'r') as f:
-                    data = json.load(f)
-                    return data
-        except Exception as e:
-            print(f"加载计时数据失败: {e}")
-        return None
-    
-    def load_saved_timer_data(self):
-        """在初始化时加载并应用保存的计时数据"""
-        data = self.load_timer_data()
-        if data:
-            self.timer_accumulated = data.get("timer_accumulated", 0)
-            saved_mode = data.get("mode", "clock")
-            # 如果保存的模式是计时模式，自动切换到计时模式并显示保存的时间
-            if saved_mode == "timer" and self.timer_accumulated > 0:
-                self.mode = "timer"
-                # 显示保存的计时时间
-                hours, remainder = divmod(int(self.timer_accumulated), 3600)
-                minutes, seconds = divmod(remainder, 60)
-                timer_display = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                self.time_label.config(text=timer_display)
-    
-    def switch_to_clock(self):
-        # 切换回时钟模式
-        self.mode = "clock"
-        self.timer_running = False
-        self.countdown_start = None
-    
-    def set_countdown(self, hours=0, minutes=0, seconds=0):
-        # 设置倒计时时间（秒）
-        self.countdown_time = hours * 3600 + minutes * 60 + seconds
-        self.mode = "countdown"
-        self.timer_running = False
-        self.countdown_start = None
-        # 显示设置的倒计时时间
-        hours_display, remainder = divmod(self.countdown_time, 3600)
-        minutes_display, seconds_display = divmod(remainder, 60)
-        countdown_display = f"{hours_display:02d}:{minutes_display:02d}:{seconds_display:02d}"
-        self.time_label.config(text=countdown_display)
-    
-    def toggle_countdown(self):
-        # 切换倒计时状态（开始/暂停）
-        if not self.timer_running:
-            # 开始倒计时
-            self.timer_running = True
-            # 如果是第一次开始或从时钟模式切换过来，重置倒计时
-            if self.countdown_start is None or self.mode != "countdown":
-                self.mode = "countdown"
-                # 显示设置的倒计时时间
-                hours, remainder = divmod(int(self.countdown_time), 3600)
-                minutes, seconds = divmod(int(remainder), 60)
-                countdown_display = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                self.time_label.config(text=countdown_display)
-            self.countdown_start = time.time()
-        else:
-            # 暂停倒计时
-            self.timer_running = False
-            # 计算已经过去的时间并更新剩余时间
-            if self.countdown_start is not None:
-                elapsed = time.time() - self.countdown_start
-                self.countdown_time = max(0, self.countdown_time - elapsed)
-                self.countdown_start = None
-    
-    def reset_countdown(self):
-        # 重置倒计时
-        self.timer_running = False
-        self.countdown_start = None
-        # 如果当前是倒计时模式，显示设置的时间
-        if self.mode == "countdown":
-            hours, remainder = divmod(self.countdown_time, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            countdown_display = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-            self.time_label.config(text=countdown_display)
-    
-    def alarm(self):
-        # 倒计时结束时的闹钟提醒
-        try:
-            # 播放系统提示音
-            winsound.Beep(1000, 1000)  # 1000Hz，持续1000ms
-            # 可以添加更多提示音或其他提醒方式
-        except Exception as e:
-            print(f"无法播放提醒音: {e}")
-    
-    def on_space_press(self, event=None):
-        # 空格键：开始/暂停当前模式的计时
-        if self.mode == "timer":
-            self.toggle_timer()
-        elif self.mode == "countdown":
-            self.toggle_countdown()
-        elif self.mode == "clock":
-            # 从时钟模式按空格，默认开始正向计时
-            self.toggle_timer()
-    
-    def on_r_press(self, event=None):
-        # R键：重置当前模式的计时
-        if self.mode == "timer":
-            self.reset_timer()
-            # 清除保存的计时数据文件
-            try:
-                if os.path.exists(self.timer_data_file):
-                    os.remove(self.timer_data_file)
-            except Exception as e:
-                print(f"清除计时数据失败: {e}")
-        elif self.mode == "countdown":
-            self.reset_countdown()
-    
-    def on_c_press(self, event=None):
-        # C键：切换回时钟模式
-        self.switch_to_clock()
-    
-    def on_t_press(self, event=None):
-        # T键：切换到正向计时模式
-        if self.mode != "timer":
-            self.mode = "timer"
-            self.timer_running = False
-            self.timer_start_time = None  # 停止计时但保留累计时间
-            # 立即显示当前累计时间
-            hours, remainder = divmod(int(self.timer_accumulated), 3600)
-            minutes, seconds = divmod(remainder, 60)
-            timer_display = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-            self.time_label.config(text=timer_display)
-    
     def show_countdown_dialog(self):
         # 显示倒计时设置对话框
+        import tkinter.messagebox  # 只在设置倒计时时才需要，不增加启动时间
         # 创建一个模态对话框获取用户输入的时间
         dialog = tk.Toplevel(self)
         dialog.title("设置倒计时")
@@ -414,411 +361,141 @@ class DigitalClock(tk.Tk):
         
         return result
     
+    def on_e_press(self, event=None):
+        # E键：把分圈记录导出到用户目录（DIGIT_CLOCK_LAP_FORMAT=jsonl时导出JSON Lines）
+        if not self.engine.laps:
+            return
+        fmt = os.environ.get("DIGIT_CLOCK_LAP_FORMAT", "csv")
+        path = os.path.join(os.path.expanduser("~"),
+                            time.strftime("digital_clock_laps_%Y%m%d_%H%M%S.") + fmt)
+        try:
+            with open(path, "w", newline="", encoding="utf-8") as out:
+                count = self.engine.laps.export(out, fmt)
+            print(f"已导出{count}圈到: {path}")
+        except Exception as e:
+            print(f"导出分圈记录失败: {e}")
+    
+    def on_i_press(self, event=None):
+        # I键：显示/隐藏运行指标浮层
+        if self.overlay is None:
+            self.overlay = tk.Label(self, font=('Courier', 9), bg='#000000', fg='#FFFF00',
+                                    justify=tk.LEFT, anchor='nw')
+            self.overlay.place(x=0, y=0)
+        else:
+            self.overlay.destroy()
+            self.overlay = None
+        self.scheduler.kick()
+    
     def on_d_press(self, event=None):
         # D键：切换到倒计时模式并显示设置对话框
-        if self.mode != "countdown":
+        if self.engine.mode != "countdown":
             # 显示倒计时设置对话框
             hours, minutes, seconds = self.show_countdown_dialog()
             # 如果用户没有取消且输入有效，则设置倒计时
             if hours > 0 or minutes > 0 or seconds > 0:
-                self.set_countdown(hours=hours, minutes=minutes, seconds=seconds)
+                self.set_countdown(hours, minutes, seconds)
+    
+    def open_clock_windows(self, spec):
+        """按配置打开附加时钟窗口"""
+        from multi_window import WindowGroup, parse_window_specs
+        try:
+            specs = parse_window_specs(spec)
+        except ValueError as e:
+            print(f"附加窗口配置错误: {e}")
+            return
+        if self.windows is None:
+            self.windows = WindowGroup(self)
+        for window_spec in specs:
+            self.windows.open(window_spec)
+        if self.glyph_cache is not None:
+            # 每个窗口可能是不同尺寸，给共享的图像缓存留出空间
+            self.glyph_cache.maxsize += 32 * len(specs)
+        self.scheduler.kick()
+    
+    def close_clock_window(self, window):
+        # 右键或由窗口管理器关闭单个附加窗口
+        self.windows.close(window)
+    
+    def build_metrics(self):
+        """登记各组件已有的计数器和直方图，输出时才读取"""
+        metrics = Metrics()
+        metrics.histogram("tick_lateness_seconds", "刷新回调相对预定时刻的延迟", self.scheduler.lateness)
+        metrics.histogram("frame_lateness_seconds", "高精度秒表每帧相对网格时刻的延迟", self.pacer.lateness)
+        metrics.histogram("tick_duration_seconds", "update_time的耗时", self.tick_duration)
+        metrics.histogram("save_duration_seconds", "追加一条计时日志的耗时", self.save_duration)
+        metrics.histogram("alarm_call_duration_seconds", "alarm()调用的耗时", self.alarm_duration)
+        metrics.counter("ticks_total", "调度刷新次数", lambda: self.scheduler.tick_count)
+        metrics.counter("frames_computed_total", "计算的显示帧数", lambda: self.renderer.frames_computed)
+        metrics.counter("frames_committed_total", "提交给Tk重绘的帧数", lambda: self.renderer.frames_committed)
+        metrics.counter("stopwatch_frames_total", "高精度秒表画出的帧数", lambda: self.pacer.frames)
+        metrics.counter("stopwatch_dropped_frames_total", "高精度秒表丢掉的帧数", lambda: self.pacer.dropped_frames)
+        metrics.counter("journal_writes_total", "追加的计时日志记录数", lambda: self.journal.appended)
+        metrics.counter("journal_syncs_total", "计时日志fsync次数", lambda: self.journal.syncs)
+        metrics.counter("history_writes_total", "写入的计时历史记录数", lambda: self.sessions_recorded)
+        metrics.counter("alarms_total", "提醒次数", lambda: self.alarms_raised)
+        metrics.counter("wall_clock_jumps_total", "检测到的系统时间调整次数", lambda: self.jumps.wall_jumps)
+        metrics.counter("suspends_total", "检测到的系统挂起次数", lambda: self.jumps.suspends)
+        metrics.gauge("scheduled_alarm_rules", "定时提醒规则数", lambda: len(self.scheduled or ()))
+        metrics.gauge("timer_running", "是否正在计时", lambda: int(self.engine.timer_running))
+        return metrics
+    
+    def overlay_text(self):
+        """指标浮层的文本：延迟和耗时按桶估计的中位数/99分位（毫秒）"""
+        lateness, duration = self.scheduler.lateness, self.tick_duration
+        return (f"延迟 p50 {lateness.quantile(0.5):g} p99 {lateness.quantile(0.99):g} ms\n"
+                f"耗时 p50 {duration.quantile(0.5):g} p99 {duration.quantile(0.99):g} ms\n"
+                f"刷新 {self.scheduler.tick_count} 重绘 {self.renderer.frames_committed}\n"
+                f"保存 {self.journal.appended}/{self.journal.syncs} 提醒 {self.alarms_raised}")
+    
+    def start_metrics_export(self, spec):
+        """把指标定期写入文件，或在回环端口上提供给Prometheus抓取"""
+        try:
+            kind, target = parse_metrics_target(spec)
+            if kind == "tcp":
+                self.metrics_server = self.metrics.serve(target)
+                print(f"运行指标: http://{target[0]}:{self.metrics_server.server_port}/metrics")
+            else:
+                self.metrics_file = target
+                self.dump_metrics()
+        except Exception as e:
+            print(f"无法输出运行指标: {e}")
+    
+    def dump_metrics(self):
+        self._metrics_dump_id = None
+        try:
+            self.metrics.dump(self.metrics_file)
+        except OSError as e:
+            print(f"写入运行指标失败: {e}")
+            return
+        self._metrics_dump_id = self.after(METRICS_INTERVAL_MS, self.dump_metrics)
+    
+    def start_control_server(self, address):
+        """启动本地控制服务，命令在Tk线程中执行"""
+        from control_server import ControlServer, CONTROL_POLL_MS
+        self.control = ControlServer(address)
+        try:
+            print(f"控制服务地址: {self.control.start()}")
+        except Exception as e:
+            print(f"启动控制服务失败: {e}")
+            self.control = None
+            return
+        if self.control.wake_fd is not None and hasattr(self.tk, "createfilehandler"):
+            # 有新命令时由Tk的文件事件唤醒，没有命令时不产生定时唤醒
+            self.tk.createfilehandler(self.control.wake_fd, tk.READABLE,
+                                      lambda fd, mask: self.drain_control())
+        else:
+            self._control_poll_ms = CONTROL_POLL_MS
+            self.after(CONTROL_POLL_MS, self.poll_control)
+    
+    def poll_control(self):
+        # 不支持文件事件的平台定时检查命令队列
+        if self.control is not None:
+            self.drain_control()
+            self.after(self._control_poll_ms, self.poll_control)
+
 
 if __name__ == "__main__":
-    try:
-        # 尝试使用DS-Digital字体
-        app = DigitalClock()
-        app.mainloop()
-    except Exception as e:
-        # 如果没有安装DS-Digital字体，创建一个使用系统字体的备用版本
-        print(f"警告: {e}")
-        print("请安装DS-Digital字体以获得最佳效果，将使用系统默认字体继续...")
-        
-        # 创建备用时钟应用
-        class FallbackClock(tk.Tk):
-            def __init__(self):
-                super().__init__()
-                self.title("数码管时钟")
-                # 计时数据存储文件路径
-                self.timer_data_file = os.path.join(os.path.expanduser("~"), ".digital_clock_timer.json")
-                # 加载计时数据
-                self.load_saved_timer_data()
-                self.overrideredirect(True)
-                self.attributes('-topmost', True)
-                self.attributes('-alpha', 0.95)
-                self.bind("<Button-1>", self.start_move)
-                self.bind("<B1-Motion>", self.on_move)
-                self.bind("<Button-3>", self.close_window)
-                # F11键切换全屏/窗口模式 - 使用bind_all确保能接收事件
-                self.bind_all("<F11>", self.toggle_fullscreen)
-                # ESC键关闭应用
-                self.bind_all("<Escape>", self.close_window)
-                # 初始化全屏状态
-                self.fullscreen = False
-                
-                # 快捷键绑定 - 使用bind_all确保无论焦点在哪里都能接收键盘事件
-                self.bind_all("<space>", self.on_space_press)  # 空格：开始/暂停计时
-                # 同时绑定大小写字母
-                self.bind_all("r", self.on_r_press)            # r键：重置计时
-                self.bind_all("R", self.on_r_press)            # R键：重置计时
-                self.bind_all("c", self.on_c_press)            # c键：切换回时钟模式
-                self.bind_all("C", self.on_c_press)            # C键：切换回时钟模式
-                self.bind_all("t", self.on_t_press)            # t键：切换到正向计时模式
-                self.bind_all("T", self.on_t_press)            # T键：切换到正向计时模式
-                self.bind_all("d", self.on_d_press)            # d键：切换到倒计时模式
-                self.bind_all("D", self.on_d_press)            # D键：切换到倒计时模式
-                
-                # 计时功能相关变量
-                self.mode = "clock"  # clock, timer, countdown
-                self.timer_running = False
-                self.timer_start_time = None
-                self.timer_paused_time = 0
-                self.timer_accumulated = 0
-                self.countdown_time = 0  # 倒计时总时间（秒）
-                self.countdown_start = None
-                
-                self.geometry("400x150")
-                
-                # 使用系统可用的等宽字体
-                self.digit_font = font.Font(family='Courier', size=70, weight='bold')
-                
-                self.time_label = tk.Label(
-                    self,
-                    font=self.digit_font,
-                    bg='#000000',
-                    fg='#00FF00',
-                    bd=0,
-                    padx=20,
-                    pady=10
-                )
-                self.time_label.pack(fill=tk.BOTH, expand=True)
-                self.update_time()
-            
-            def update_time(self):
-                # 根据当前模式更新显示
-                if self.mode == "clock":
-                    # 时钟模式
-                    current_time = datetime.datetime.now().strftime("%H:%M")
-                    self.time_label.config(text=current_time)
-                elif self.mode == "timer":
-                    # 正向计时模式
-                    if self.timer_running:
-                        # 计算经过的时间
-                        elapsed = time.time() - self.timer_start_time + self.timer_accumulated
-                        hours, remainder = divmod(int(elapsed), 3600)
-                        minutes, seconds = divmod(remainder, 60)
-                        timer_display = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                        self.time_label.config(text=timer_display)
-                elif self.mode == "countdown":
-                    # 倒计时模式
-                    if self.countdown_start is not None:
-                        elapsed = time.time() - self.countdown_start
-                        remaining = max(0, self.countdown_time - elapsed)
-                        hours, remainder = divmod(int(remaining), 3600)
-                        minutes, seconds = divmod(remainder, 60)
-                        countdown_display = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                        self.time_label.config(text=countdown_display)
-                        # 检查倒计时是否结束
-                        if remaining <= 0 and self.timer_running:
-                            self.timer_running = False
-                            self.time_label.config(text="00:00:00")
-                            # 调用闹钟提醒功能
-                            self.alarm()
-                
-                # 防止系统自动息屏：通过Windows API保持系统活动
-                if use_ctype:
-                    # 使用Windows API设置系统保持活动状态
-                    ctypes.windll.kernel32.SetThreadExecutionState(
-                        ES_CONTINUOUS | ES_SYSTEM_REQUIRED | ES_DISPLAY_REQUIRED
-                    )
-                else:
-                    # 备用方法：通过生成鼠标移动事件尝试重置系统活动计时器
-                    self.event_generate("<Motion>")
-                
-                self.after(1000, self.update_time)
-            
-            def toggle_timer(self):
-                # 切换计时状态（开始/暂停）
-                if not self.timer_running:
-                    # 开始计时
-                    self.timer_running = True
-                    self.timer_start_time = time.time()
-                    # 如果是时钟模式切换到计时模式
-                    if self.mode == "clock":
-                        self.mode = "timer"
-                        # 重置计时显示
-                        self.timer_accumulated = 0
-                        self.time_label.config(text="00:00:00")
-                else:
-                    # 暂停计时
-                    self.timer_running = False
-                    # 累计已计时时间
-                    self.timer_accumulated += time.time() - self.timer_start_time
-                    self.timer_start_time = None
-                    # 保存计时数据
-                    self.save_timer_data()
-            
-            def reset_timer(self):
-                # 重置计时
-                self.timer_running = False
-                self.timer_accumulated = 0
-                self.timer_start_time = None
-                self.timer_paused_time = 0
-                # 如果当前是计时模式，显示0
-                if self.mode == "timer":
-                    self.time_label.config(text="00:00:00")
-            
-            def save_timer_data(self):
-                """保存计时数据到文件"""
-                try:
-                    data = {
-                        "timer_accumulated": self.timer_accumulated,
-                        "mode": self.mode
-                    }
-                    with open(self.timer_data_file, 'w') as f:
-                        json.dump(data, f)
-                except Exception as e:
-                    print(f"保存计时数据失败: {e}")
-            
-            def load_timer_data(self):
-                """从文件加载计时数据"""
-                try:
-                    if os.path.exists(self.timer_data_file):
-                        with open(self.timer_data_file, 'r') as f:
-                            data = json.load(f)
-                            return data
-                except Exception as e:
-                    print(f"加载计时数据失败: {e}")
-                return None
-            
-            def load_saved_timer_data(self):
-                """在初始化时加载并应用保存的计时数据"""
-                data = self.load_timer_data()
-                if data:
-                    self.timer_accumulated = data.get("timer_accumulated", 0)
-                    saved_mode = data.get("mode", "clock")
-                    # 如果保存的模式是计时模式，自动切换到计时模式并显示保存的时间
-                    if saved_mode == "timer" and self.timer_accumulated > 0:
-                        self.mode = "timer"
-                        # 显示保存的计时时间
-                        hours, remainder = divmod(int(self.timer_accumulated), 3600)
-                        minutes, seconds = divmod(remainder, 60)
-                        timer_display = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                        self.time_label.config(text=timer_display)
-            
-            def switch_to_clock(self):
-                # 切换回时钟模式
-                self.mode = "clock"
-                self.timer_running = False
-                self.countdown_start = None
-            
-            def set_countdown(self, hours=0, minutes=0, seconds=0):
-                # 设置倒计时时间（秒）
-                self.countdown_time = hours * 3600 + minutes * 60 + seconds
-                self.mode = "countdown"
-                self.timer_running = False
-                self.countdown_start = None
-                # 显示设置的倒计时时间
-                hours_display, remainder = divmod(self.countdown_time, 3600)
-                minutes_display, seconds_display = divmod(remainder, 60)
-                countdown_display = f"{hours_display:02d}:{minutes_display:02d}:{seconds_display:02d}"
-                self.time_label.config(text=countdown_display)
-            
-            def toggle_countdown(self):
-                # 切换倒计时状态（开始/暂停）
-                if not self.timer_running:
-                    # 开始倒计时
-                    self.timer_running = True
-                    # 如果是第一次开始或从时钟模式切换过来，重置倒计时
-                    if self.countdown_start is None or self.mode != "countdown":
-                        self.mode = "countdown"
-                        # 显示设置的倒计时时间
-                        hours, remainder = divmod(self.countdown_time, 3600)
-                        minutes, seconds = divmod(remainder, 60)
-                        countdown_display = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                        self.time_label.config(text=countdown_display)
-                    self.countdown_start = time.time()
-                else:
-                    # 暂停倒计时
-                    self.timer_running = False
-                    # 计算已经过去的时间并更新剩余时间
-                    elapsed = time.time() - self.countdown_start
-                    self.countdown_time = max(0, self.countdown_time - elapsed)
-                    self.countdown_start = None
-            
-            def reset_countdown(self):
-                # 重置倒计时
-                self.timer_running = False
-                self.countdown_start = None
-                # 如果当前是倒计时模式，显示设置的时间
-                if self.mode == "countdown":
-                    hours, remainder = divmod(self.countdown_time, 3600)
-                    minutes, seconds = divmod(remainder, 60)
-                    countdown_display = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                    self.time_label.config(text=countdown_display)
-            
-            def alarm(self):
-                # 倒计时结束时的闹钟提醒
-                try:
-                    # 播放系统提示音
-                    winsound.Beep(1000, 1000)  # 1000Hz，持续1000ms
-                except Exception as e:
-                    print(f"无法播放提醒音: {e}")
-            
-            def on_space_press(self, event=None):
-                # 空格键：开始/暂停当前模式的计时
-                if self.mode == "timer":
-                    self.toggle_timer()
-                elif self.mode == "countdown":
-                    self.toggle_countdown()
-                elif self.mode == "clock":
-                    # 从时钟模式按空格，默认开始正向计时
-                    self.toggle_timer()
-            
-            def on_r_press(self, event=None):
-                # R键：重置当前模式的计时
-                if self.mode == "timer":
-                    self.reset_timer()
-                    # 清除保存的计时数据文件
-                    try:
-                        if os.path.exists(self.timer_data_file):
-                            os.remove(self.timer_data_file)
-                    except Exception as e:
-                        print(f"清除计时数据失败: {e}")
-                elif self.mode == "countdown":
-                    self.reset_countdown()
-            
-            def on_c_press(self, event=None):
-                # C键：切换回时钟模式
-                self.switch_to_clock()
-            
-            def on_t_press(self, event=None):
-                # T键：切换到正向计时模式
-                if self.mode != "timer":
-                    self.mode = "timer"
-                    self.timer_running = False
-                    self.timer_start_time = None  # 停止计时但保留累计时间
-                    # 立即显示当前累计时间
-                    hours, remainder = divmod(int(self.timer_accumulated), 3600)
-                    minutes, seconds = divmod(remainder, 60)
-                    timer_display = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                    self.time_label.config(text=timer_display)
-            
-            def show_countdown_dialog(self):
-                # 显示倒计时设置对话框
-                # 创建一个模态对话框获取用户输入的时间
-                dialog = tk.Toplevel(self)
-                dialog.title("设置倒计时")
-                dialog.attributes('-topmost', True)
-                dialog.geometry("300x200")
-                
-                # 设置对话框在主窗口中央
-                dialog.transient(self)
-                dialog.grab_set()
-                
-                # 创建标签和输入框
-                tk.Label(dialog, text="小时:").grid(row=0, column=0, padx=10, pady=10)
-                hour_var = tk.StringVar(value="0")
-                hour_entry = tk.Entry(dialog, textvariable=hour_var, width=5)
-                hour_entry.grid(row=0, column=1, padx=5, pady=10)
-                
-                tk.Label(dialog, text="分钟:").grid(row=1, column=0, padx=10, pady=10)
-                minute_var = tk.StringVar(value="5")  # 默认5分钟
-                minute_entry = tk.Entry(dialog, textvariable=minute_var, width=5)
-                minute_entry.grid(row=1, column=1, padx=5, pady=10)
-                
-                tk.Label(dialog, text="秒钟:").grid(row=2, column=0, padx=10, pady=10)
-                second_var = tk.StringVar(value="0")
-                second_entry = tk.Entry(dialog, textvariable=second_var, width=5)
-                second_entry.grid(row=2, column=1, padx=5, pady=10)
-                
-                # 结果变量
-                result = [0, 0, 0]  # [小时, 分钟, 秒]
-                
-                def ok_pressed():
-                    # 获取用户输入并验证
-                    try:
-                        hours = int(hour_var.get())
-                        minutes = int(minute_var.get())
-                        seconds = int(second_var.get())
-                        
-                        # 验证输入的有效性
-                        if hours < 0 or minutes < 0 or seconds < 0:
-                            messagebox.showerror("错误", "请输入非负整数")
-                            return
-                        if hours == 0 and minutes == 0 and seconds == 0:
-                            messagebox.showerror("错误", "请至少设置一个非零时间")
-                            return
-                        
-                        # 存储结果
-                        result[0] = hours
-                        result[1] = minutes
-                        result[2] = seconds
-                        dialog.destroy()
-                    except ValueError:
-                        messagebox.showerror("错误", "请输入有效的整数")
-                
-                # 创建按钮
-                button_frame = tk.Frame(dialog)
-                button_frame.grid(row=3, column=0, columnspan=2, pady=20)
-                
-                ok_button = tk.Button(button_frame, text="确定", command=ok_pressed)
-                ok_button.pack(side=tk.LEFT, padx=10)
-                
-                cancel_button = tk.Button(button_frame, text="取消", command=dialog.destroy)
-                cancel_button.pack(side=tk.LEFT, padx=10)
-                
-                # 等待对话框关闭
-                self.wait_window(dialog)
-                
-                return result
-                
-            def on_d_press(self, event=None):
-                # D键：切换到倒计时模式并显示设置对话框
-                if self.mode != "countdown":
-                    # 显示倒计时设置对话框
-                    hours, minutes, seconds = self.show_countdown_dialog()
-                    # 如果用户没有取消且输入有效，则设置倒计时
-                    if hours > 0 or minutes > 0 or seconds > 0:
-                        self.set_countdown(hours=hours, minutes=minutes, seconds=seconds)
-            
-            def start_move(self, event):
-                self.x = event.x
-                self.y = event.y
-            
-            def on_move(self, event):
-                x = self.winfo_pointerx() - self.x
-                y = self.winfo_pointery() - self.y
-                self.geometry(f"+{x}+{y}")
-            
-            def close_window(self, event):
-                self.destroy()
-                
-            def toggle_fullscreen(self, event=None):
-                # 切换全屏/窗口模式
-                self.fullscreen = not self.fullscreen
-                
-                if self.fullscreen:
-                    # 保存当前窗口状态和属性
-                    self.old_geometry = self.geometry()
-                    self.old_overrideredirect = self.overrideredirect()
-                    # 临时禁用overrideredirect以允许全屏
-                    self.overrideredirect(False)
-                    # 进入全屏模式
-                    self.attributes('-fullscreen', True)
-                    # 调整字体大小以适应屏幕
-                    screen_width = self.winfo_screenwidth()
-                    screen_height = self.winfo_screenheight()
-                    font_size = int(screen_height * 0.3)  # 全屏时字体大小为屏幕高度的30%
-                    self.digit_font.configure(size=font_size)
-                else:
-                    # 退出全屏模式
-                    self.attributes('-fullscreen', False)
-                    # 恢复原来的窗口大小和位置
-                    self.geometry(self.old_geometry)
-                    # 恢复原来的字体大小
-                    self.digit_font.configure(size=70)
-                    # 恢复overrideredirect属性
-                    self.overrideredirect(self.old_overrideredirect)
-        
-        fallback_app = FallbackClock()
-        fallback_app.mainloop()
\ No newline at end of file
+    # 默认使用七段数码管显示（DIGIT_CLOCK_STYLE=font时使用DS-Digital字体，
+    # 未安装时在创建窗口内容前就换用系统字体，只创建一次程序）
+    app = DigitalClock()
+    app.mainloop()
@@ -0,0 +1,32 @@
+class LabelRenderer:
+    """把每帧文本提交到Label，文本与上一次提交的相同时不调用Tk"""
+
+    def __init__(self, label):
+        self.label = label
+        self.last_text = None
+        # 计算的帧数和实际提交给Tk的帧数
+        self.frames_computed = 0
+        self.frames_committed = 0
+
+    def render(self, text):
+        """提交一帧，返回是否实际更新了显示"""
+        self.frames_computed += 1
+        if text == self.last_text:
+            return False
+        self.label.config(text=text)
+        self.last_text = text
+        self.frames_committed += 1
+        return True
+
+    def invalidate(self):
+        """下一帧无论内容是否变化都重新提交"""
+        self.last_text = None
+
+    def stats(self):
+        return {
+            "frames_computed": self.frames_computed,
+            "frames_committed": self.frames_committed,
+        }
+
+    def report(self):
+        return f"计算帧数: {self.frames_computed}，提交帧数: {self.frames_committed}"
@@ -0,0 +1,140 @@
+import math
+import tkinter as tk
+from collections import OrderedDict
+
+from segment_display import (
+    SegmentDisplay, CELL_DIGIT, CELL_WIDTHS, digit_polygons, dot_boxes,
+)
+
+
+def cell_pixel_width(kind, height):
+    """单元格图像的像素宽度"""
+    return max(1, int(round(CELL_WIDTHS[kind] * height)))
+
+
+def polygon_rects(points, width, height):
+    """把凸多边形按行扫描成矩形列表[(x0, y0, x1, y1)]（右下为开区间）
+
+    相邻行覆盖范围相同时合并为一个矩形，竖直段通常只需要几个矩形。
+    """
+    xs, ys = points[0::2], points[1::2]
+    n = len(xs)
+    rects = []
+    previous, start = None, 0
+    top = max(0, int(math.floor(min(ys))))
+    bottom = min(height, int(math.ceil(max(ys))))
+    for row in range(top, bottom + 1):
+        span = None
+        if row < bottom:
+            yc = row + 0.5
+            lo, hi = math.inf, -math.inf
+            for i in range(n):
+                x1, y1 = xs[i], ys[i]
+                x2, y2 = xs[(i + 1) % n], ys[(i + 1) % n]
+                if (y1 <= yc < y2) or (y2 <= yc < y1):
+                    x = x1 + (yc - y1) * (x2 - x1) / (y2 - y1)
+                    lo, hi = min(lo, x), max(hi, x)
+            if lo < hi:
+                # 像素中心落在[lo, hi]内的列
+                x0, x1 = max(0, math.ceil(lo - 0.5)), min(width, math.floor(hi - 0.5) + 1)
+                if x0 < x1:
+                    span = (x0, x1)
+        if span != previous:
+            if previous is not None:
+                rects.append((previous[0], start, previous[1], row))
+            previous, start = span, row
+    return rects
+
+
+def cell_shapes(kind, height):
+    """单元格内各段（或各点）的多边形坐标，顺序与掩码位一致"""
+    if kind == CELL_DIGIT:
+        return digit_polygons(0, 0, height)
+    return [(x0, y0, x1, y0, x1, y1, x0, y1) for x0, y0, x1, y1 in dot_boxes(kind, 0, 0, height)]
+
+
+def render_glyph(master, kind, mask, height, color, off_color=None):
+    """把一个单元格光栅化为PhotoImage，off_color为None时熄灭段透明"""
+    width = cell_pixel_width(kind, height)
+    image = tk.PhotoImage(master=master, width=width, height=height)
+    for bit, shape in enumerate(cell_shapes(kind, height)):
+        fill = color if mask >> bit & 1 else off_color
+        if fill is None:
+            continue
+        for rect in polygon_rects(shape, width, height):
+            image.put(fill, to=rect)
+    return image
+
+
+class GlyphCache:
+    """预渲染单元格图像的LRU缓存，键为(单元格类型, 掩码, 高度, 颜色, 熄灭颜色)"""
+
+    def __init__(self, master, maxsize=64):
+        self.master = master
+        self.maxsize = maxsize
+        self._images = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._images)
+
+    def get(self, kind, mask, height, color, off_color=None):
+        key = (kind, mask, height, color, off_color)
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+            self.hits += 1
+            return image
+        self.misses += 1
+        image = render_glyph(self.master, kind, mask, height, color, off_color)
+        self._images[key] = image
+        # 被淘汰的图像如果仍在显示，由显示控件持有的引用保证不被删除
+        while len(self._images) > self.maxsize:
+            self._images.popitem(last=False)
+            self.evictions += 1
+        return image
+
+    def clear(self):
+        self._images.clear()
+
+
+class GlyphDisplay(SegmentDisplay):
+    """用缓存的单元格图像拼出时间的七段数码管显示
+
+    每个单元格是一个图像item，刷新时只替换内容变化的单元格的图像；
+    尺寸变化（如切换全屏）后再次回到同一尺寸时直接使用缓存的图像。
+    """
+
+    # 新建的图像item没有图像，任何掩码都需要绘制
+    initial_mask = -1
+
+    def __init__(self, master, fg='#00FF00', bg='#000000', off_color=None, cache=None, **kwargs):
+        super().__init__(master, fg=fg, bg=bg, off_color=off_color, **kwargs)
+        # 熄灭段与背景同色时不绘制（透明）
+        self.glyph_off_color = None if self.off_color == bg else self.off_color
+        self.cache = cache or GlyphCache(self)
+        self._digit_h = 1
+        self._cell_images = []  # 当前显示的图像，保持引用
+
+    def digit_height(self, kinds, width, height):
+        return int(super().digit_height(kinds, width, height))
+
+    def _layout(self, kinds):
+        super()._layout(kinds)
+        self._cell_images = [None] * len(kinds)
+
+    def _create_cell(self, kind, x, y, digit_h):
+        self._digit_h = digit_h
+        return self.create_image(int(round(x)), int(round(y)), anchor=tk.NW)
+
+    def _draw_cell(self, index, kind, mask):
+        image = self.cache.get(kind, mask, self._digit_h, self.on_color, self.glyph_off_color)
+        self.itemconfigure(self._items[index], image=image)
+        self._cell_images[index] = image
+
+    def report(self):
+        return (f"计算帧数: {self.frames_computed}，提交帧数: {self.frames_committed}，"
+                f"图像缓存: {len(self.cache)}张，命中{self.cache.hits}次，"
+                f"未命中{self.cache.misses}次，淘汰{self.cache.evictions}次")
@@ -0,0 +1,130 @@
+import os
+import threading
+from array import array
+from bisect import bisect_left
+
+# 直方图各桶的上限（毫秒），最后还有一个+Inf桶
+LATENESS_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+DURATION_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 100)
+
+# 未指定端口时的回环指标端口、写入指标文件的间隔（毫秒）
+DEFAULT_METRICS_PORT = 47651
+METRICS_INTERVAL_MS = 15000
+LOCALHOST = "127.0.0.1"
+
+
+class Histogram:
+    """固定桶的直方图（毫秒）
+
+    桶计数保存在预先分配的array('q')中，记录一次只是一次二分查找和几次加法，
+    不创建列表或其他对象，可以在每次刷新时常开使用。
+    """
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = array('q', bytes(8 * (len(self.bounds) + 1)))
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """按桶估计分位数，返回所在桶的上限（落在+Inf桶时为inf）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+
+def parse_metrics_target(spec):
+    """解析指标输出位置：tcp:<端口>或tcp:<主机>:<端口>为回环HTTP端口，其他为文件路径
+
+    返回("tcp", (主机, 端口))或("file", 路径)。
+    """
+    if spec.startswith("tcp:"):
+        host, _, port = spec[4:].rpartition(":")
+        return "tcp", (host or LOCALHOST, int(port or DEFAULT_METRICS_PORT))
+    return "file", os.path.expanduser(spec)
+
+
+class Metrics:
+    """运行时指标的登记表，输出Prometheus文本格式
+
+    各组件自己维护计数器（如TickScheduler.tick_count、渲染器的frames_committed），
+    这里只登记读取它们的函数，输出时才读取，刷新路径上没有额外开销。
+    """
+
+    def __init__(self, prefix="digital_clock_"):
+        self.prefix = prefix
+        self._metrics = []  # (名称, 类型, 说明, 直方图或取值函数)
+
+    def counter(self, name, help_text, getter):
+        self._metrics.append((self.prefix + name, "counter", help_text, getter))
+
+    def gauge(self, name, help_text, getter):
+        self._metrics.append((self.prefix + name, "gauge", help_text, getter))
+
+    def histogram(self, name, help_text, histogram):
+        """登记毫秒直方图，输出时按Prometheus的惯例换算为秒"""
+        self._metrics.append((self.prefix + name, "histogram", help_text, histogram))
+
+    def exposition(self):
+        """返回Prometheus文本格式的全部指标"""
+        lines = []
+        for name, kind, help_text, source in self._metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind != "histogram":
+                lines.append(f"{name} {source()}")
+                continue
+            cumulative = 0
+            for bound, n in zip(source.bounds, source.counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{le="{bound / 1000:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{le="+Inf"}} {source.count}')
+            lines.append(f"{name}_sum {source.sum / 1000:.9g}")
+            lines.append(f"{name}_count {source.count}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """原子地把指标写入文件（可供node_exporter的textfile收集器读取）"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.exposition())
+        os.replace(tmp_path, path)
+
+    def serve(self, address):
+        """在后台线程的回环HTTP端口上提供指标，返回服务器对象（调用shutdown()停止）"""
+        # 只在开启指标端口时才需要的模块
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.exposition().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(address, Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        return server
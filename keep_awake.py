@@ -0,0 +1,176 @@
+import os
+
+# Windows API常量
+ES_CONTINUOUS = 0x80000000
+ES_SYSTEM_REQUIRED = 0x00000001
+ES_DISPLAY_REQUIRED = 0x00000002
+
+# 保持唤醒策略：一直保持、只在计时运行时保持、不保持
+POLICY_ALWAYS = "always"
+POLICY_RUNNING = "running"
+POLICY_OFF = "off"
+
+APP_NAME = "数码管时钟"
+REASON = "显示时钟"
+
+
+class WindowsInhibitor:
+    """Windows：ES_CONTINUOUS设置一次后一直有效，直到再次调用清除"""
+
+    name = "windows"
+
+    def __init__(self):
+        import ctypes
+        self._set_state = ctypes.windll.kernel32.SetThreadExecutionState
+
+    def acquire(self):
+        self._set_state(ES_CONTINUOUS | ES_SYSTEM_REQUIRED | ES_DISPLAY_REQUIRED)
+
+    def release(self):
+        self._set_state(ES_CONTINUOUS)
+
+
+class DBusInhibitor:
+    """通过org.freedesktop.ScreenSaver接口阻止息屏
+
+    screensaver是任何提供Inhibit(应用名, 原因) -> cookie和UnInhibit(cookie)的对象，
+    默认连接会话总线上的真实服务，测试时可以传入本地替身。
+    """
+
+    name = "dbus"
+
+    def __init__(self, screensaver=None):
+        self.screensaver = screensaver or session_screensaver()
+        self._cookie = None
+
+    def acquire(self):
+        self._cookie = self.screensaver.Inhibit(APP_NAME, REASON)
+
+    def release(self):
+        if self._cookie is not None:
+            self.screensaver.UnInhibit(self._cookie)
+            self._cookie = None
+
+
+def session_screensaver():
+    """返回会话总线上的ScreenSaver代理，需要dbus-python"""
+    import dbus
+    bus = dbus.SessionBus()
+    proxy = bus.get_object("org.freedesktop.ScreenSaver", "/org/freedesktop/ScreenSaver")
+    return dbus.Interface(proxy, "org.freedesktop.ScreenSaver")
+
+
+class SystemdInhibitor:
+    """没有dbus-python时用systemd-inhibit子进程持有空闲锁
+
+    被锁住的命令是从管道读取的cat：关闭管道时cat退出、锁随之释放，
+    本进程异常退出时管道也会被关闭，不会留下一直持有锁的子进程。
+    """
+
+    name = "systemd-inhibit"
+
+    def __init__(self):
+        self._process = None
+
+    def acquire(self):
+        import subprocess
+        self._process = subprocess.Popen(
+            ["systemd-inhibit", "--what=idle", f"--who={APP_NAME}", f"--why={REASON}",
+             "--mode=block", "cat"],
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def release(self):
+        if self._process is not None:
+            import subprocess
+            self._process.stdin.close()
+            try:
+                self._process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                self._process.terminate()
+                self._process.wait()
+            self._process = None
+
+
+class NullInhibitor:
+    name = "none"
+
+    def acquire(self):
+        pass
+
+    def release(self):
+        pass
+
+
+def default_inhibitor():
+    """按平台选择阻止息屏的方式"""
+    import platform
+    import shutil
+    if platform.system() == 'Windows':
+        try:
+            return WindowsInhibitor()
+        except (ImportError, AttributeError, OSError) as e:
+            print(f"无法使用Windows API保持唤醒: {e}")
+            return NullInhibitor()
+    try:
+        return DBusInhibitor()
+    except Exception:
+        pass
+    if shutil.which("systemd-inhibit"):
+        return SystemdInhibitor()
+    return NullInhibitor()
+
+
+class KeepAwake:
+    """防止系统休眠和息屏的服务
+
+    只在需要的状态改变时调用一次系统接口：策略为always时启动后获取一次，
+    策略为running时随计时开始/暂停获取和释放，退出时释放。
+    每次刷新显示不再调用任何系统接口。
+    """
+
+    def __init__(self, inhibitor=None, policy=None):
+        self.policy = policy or os.environ.get("DIGIT_CLOCK_KEEP_AWAKE", POLICY_ALWAYS)
+        if self.policy == POLICY_OFF:
+            inhibitor = NullInhibitor()
+        # 未指定时在第一次需要获取时才选择（避免启动时导入平台相关模块）
+        self.inhibitor = inhibitor
+        self.held = False
+        # 实际获取和释放的次数
+        self.acquires = 0
+        self.releases = 0
+
+    def update(self, running=False):
+        """计时状态变化时调用，按策略获取或释放"""
+        if self.policy == POLICY_ALWAYS:
+            wanted = True
+        elif self.policy == POLICY_RUNNING:
+            wanted = running
+        else:
+            wanted = False
+        if wanted == self.held:
+            return
+        try:
+            if wanted:
+                if self.inhibitor is None:
+                    self.inhibitor = default_inhibitor()
+                self.inhibitor.acquire()
+                self.acquires += 1
+            else:
+                self.inhibitor.release()
+                self.releases += 1
+            self.held = wanted
+        except Exception as e:
+            print(f"设置保持唤醒失败: {e}")
+
+    def close(self):
+        if self.held:
+            try:
+                self.inhibitor.release()
+                self.releases += 1
+            except Exception as e:
+                print(f"释放保持唤醒失败: {e}")
+            self.held = False
+
+    def report(self):
+        name = self.inhibitor.name if self.inhibitor is not None else "none"
+        return f"保持唤醒({name}, {self.policy}): 获取{self.acquires}次，释放{self.releases}次"
@@ -0,0 +1,176 @@
+import tkinter as tk
+from collections import namedtuple
+from tkinter import font as tkfont
+
+from auto_fit import FittedLabelRenderer
+from segment_display import SegmentDisplay
+from glyph_cache import GlyphDisplay
+from window_drag import DragCoalescer
+from clock_source import NS_PER_SEC
+from tick_scheduler import seconds_to_boundary, IDLE_TICK
+
+# 附加窗口可以显示的内容：
+#   main  与主窗口相同   clock  当前时间   timer  正向计时   countdown  倒计时
+#   countdown:<名称>  TimerManager中的命名倒计时
+SOURCES = ("main", "clock", "timer", "countdown")
+
+# 附加窗口的配置：显示内容、几何位置（如"400x150+1920+0"，可为空）、是否全屏
+WindowSpec = namedtuple("WindowSpec", ["source", "geometry", "fullscreen"])
+
+
+def parse_window_specs(spec):
+    """解析附加窗口配置，如"clock@400x150+1920+0;countdown:tea@+3840+0!"
+
+    每个窗口写成"显示内容@几何位置"，用分号分隔；末尾加"!"表示在该位置全屏，
+    可以把窗口放到对应显示器上并铺满。
+    """
+    specs = []
+    for item in filter(None, (part.strip() for part in spec.split(";"))):
+        source, _, geometry = item.partition("@")
+        fullscreen = geometry.endswith("!")
+        geometry = geometry.rstrip("!")
+        if source not in SOURCES and not source.startswith("countdown:"):
+            raise ValueError(f"无法识别的窗口显示内容: {source}")
+        specs.append(WindowSpec(source, geometry or None, fullscreen))
+    return specs
+
+
+def make_display(master, style, digit_font=None, cache=None):
+    """在master中创建一个显示控件，返回渲染器（具有render和resizer）"""
+    if style == "font":
+        label = tk.Label(master, font=digit_font, bg='#000000', fg='#00FF00', bd=0, padx=20, pady=10)
+        label.pack(fill=tk.BOTH, expand=True)
+        return FittedLabelRenderer(label, digit_font, padx=20, pady=10)
+    if style == "segment":
+        display = SegmentDisplay(master, fg='#00FF00', bg='#000000')
+    else:
+        display = GlyphDisplay(master, fg='#00FF00', bg='#000000', cache=cache)
+    display.pack(fill=tk.BOTH, expand=True)
+    return display
+
+
+def timer_source_format(engine):
+    # 与ClockEngine.display_text相同：高精度模式下正向计时显示到百分之一秒
+    return engine.precision_format if engine.precision else engine.timer_format
+
+
+def source_text(source, engine, timers, main_text):
+    """计算一种显示内容当前的文本"""
+    if source == "main":
+        return main_text
+    if source == "clock":
+        return engine.clock_format.clock(engine.clock.wall_ns())
+    if source == "timer":
+        return timer_source_format(engine).duration(engine.timer_elapsed_ns())
+    if source == "countdown":
+        return engine.timer_format.duration(engine.countdown_remaining_ns())
+    name = source.partition(":")[2]
+    if name not in timers:
+        return "--:--:--"
+    return engine.timer_format.duration(timers.remaining_ns(name))
+
+
+def source_delay(source, engine, timers):
+    """返回一种显示内容到下一次变化的时间（秒）"""
+    if source == "main":
+        return engine.next_change_delay()
+    if source == "clock":
+        return seconds_to_boundary(engine.clock.wall_ns() / NS_PER_SEC, engine.clock_format.resolution_ns / NS_PER_SEC)
+    step = engine.timer_format.resolution_ns
+    if source == "timer":
+        if not engine.timer_running or engine.mode != "timer":
+            return IDLE_TICK
+        step = timer_source_format(engine).resolution_ns
+        return (step - engine.timer_elapsed_ns() % step) / NS_PER_SEC
+    if source == "countdown":
+        if engine.countdown_deadline is None:
+            return IDLE_TICK
+        return (engine.countdown_remaining_ns() % step) / NS_PER_SEC
+    timer = timers.get(source.partition(":")[2])
+    if timer is None or not timer.running:
+        return IDLE_TICK
+    return (timer.remaining_ns(timers.clock.monotonic_ns()) % step) / NS_PER_SEC
+
+
+class ClockWindow(tk.Toplevel):
+    """同一进程中的附加时钟窗口，只负责显示，文本由主窗口的刷新统一计算"""
+
+    def __init__(self, app, spec):
+        super().__init__(app)
+        self.source = spec.source
+        self.overrideredirect(True)
+        self.attributes('-topmost', True)
+        self.attributes('-alpha', 0.95)
+        self.configure(bg='#000000')
+        # 字体显示方式下每个窗口需要自己的字体对象（字号随窗口大小变化）
+        digit_font = tkfont.Font(self, **app.digit_font.actual()) if app.digit_font is not None else None
+        # 七段数码管图像缓存在所有窗口之间共享
+        self.renderer = make_display(self, app.display_style, digit_font, app.glyph_cache)
+        self.geometry(spec.geometry or "400x150")
+        if spec.fullscreen:
+            self.overrideredirect(False)
+            self.attributes('-fullscreen', True)
+        # 拖动移动窗口，右键关闭这个窗口
+        self.drag = DragCoalescer(self)
+        self.bind("<Button-1>", self.drag.start)
+        self.bind("<B1-Motion>", self.drag.motion)
+        self.bind("<ButtonRelease-1>", self.drag.finish)
+        self.bind("<Button-3>", lambda event: app.close_clock_window(self))
+        # 全屏窗口有标题栏，由窗口管理器关闭时同样从窗口组中移除
+        self.protocol("WM_DELETE_WINDOW", lambda: app.close_clock_window(self))
+
+
+class WindowGroup:
+    """所有附加窗口共用主窗口的一次刷新
+
+    每次刷新每种显示内容只计算一次文本，再分发给显示该内容的所有窗口，
+    各窗口的渲染器只在文本变化时提交到Tk。
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.windows = []
+        # 统计：计算的文本数、分发给窗口的次数
+        self.texts_computed = 0
+        self.renders = 0
+
+    def __len__(self):
+        return len(self.windows)
+
+    def open(self, spec):
+        window = ClockWindow(self.app, spec)
+        self.windows.append(window)
+        return window
+
+    def close(self, window):
+        if window in self.windows:
+            self.windows.remove(window)
+        window.destroy()
+
+    def render(self, main_text):
+        texts = {}
+        engine, timers = self.app.engine, self.app.timers
+        closed = []
+        for window in self.windows:
+            text = texts.get(window.source)
+            if text is None:
+                text = texts[window.source] = source_text(window.source, engine, timers, main_text)
+                self.texts_computed += 1
+            try:
+                window.renderer.render(text)
+            except tk.TclError:
+                # 窗口已被销毁（不经过close），移除它，不影响主窗口和其他窗口的刷新
+                closed.append(window)
+                continue
+            self.renders += 1
+        for window in closed:
+            self.windows.remove(window)
+
+    def next_change_delay(self):
+        """各窗口显示内容中最早的下一次变化时间（秒）"""
+        engine, timers = self.app.engine, self.app.timers
+        sources = {window.source for window in self.windows}
+        return min((source_delay(s, engine, timers) for s in sources), default=IDLE_TICK)
+
+    def report(self):
+        return f"附加窗口: {len(self.windows)}个，计算文本{self.texts_computed}次，分发{self.renders}次"
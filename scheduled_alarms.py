@@ -0,0 +1,224 @@
+import datetime
+import heapq
+import itertools
+import time
+from bisect import bisect_left
+
+from clock_source import SYSTEM_CLOCK, NS_PER_SEC
+
+# 星期名称，按cron的编号（0和7都表示星期日）
+WEEKDAYS = {"sun": 0, "mon": 1, "tue": 2, "wed": 3, "thu": 4, "fri": 5, "sat": 6}
+# 各字段的取值范围：分、时、日、月、星期
+_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+# 向后查找下一次触发的最大天数（覆盖2月29日这样每4年出现一次的日期）
+_SEARCH_DAYS = 8 * 366
+
+
+def _parse_value(text, names):
+    text = text.lower()
+    return names[text] if text in names else int(text)
+
+
+def parse_field(text, low, high, names=None):
+    """解析cron的一个字段（*、a-b、a,b、*/n、a-b/n），返回排序后的取值元组"""
+    names = names or {}
+    values = set()
+    for part in text.split(","):
+        part, _, step = part.partition("/")
+        if part == "*":
+            first, last = low, high
+        elif "-" in part:
+            first, last = (_parse_value(v, names) for v in part.split("-", 1))
+        else:
+            first = last = _parse_value(part, names)
+            if step:
+                # 与cron相同，a/n表示从a开始直到最大值，每隔n
+                last = high
+        if not low <= first <= last <= high:
+            raise ValueError(f"超出范围{low}-{high}: {text}")
+        values.update(range(first, last + 1, int(step) if step else 1))
+    return tuple(sorted(values))
+
+
+def parse_rule(spec):
+    """把规则解析为(分, 时, 日, 月, 星期)取值元组
+
+    支持标准的5段cron写法（如"30 7 * * 1-5"），以及"HH:MM [星期]"的简写
+    （如"07:30 mon-fri"、"22:00 sat,sun"，省略星期表示每天）。
+    """
+    parts = spec.split()
+    if parts and ":" in parts[0]:
+        hour, _, minute = parts[0].partition(":")
+        if len(parts) > 2:
+            raise ValueError(f"无法识别的提醒规则: {spec}")
+        parts = [str(int(minute)), str(int(hour)), "*", "*", parts[1] if len(parts) > 1 else "*"]
+    if len(parts) != 5:
+        raise ValueError(f"提醒规则应为5段cron写法或HH:MM [星期]: {spec}")
+    fields = [parse_field(text, low, high) for text, (low, high) in zip(parts[:4], _FIELDS)]
+    weekdays = parse_field(parts[4], *_FIELDS[4], names=WEEKDAYS)
+    # 7与0同为星期日
+    fields.append(tuple(sorted({day % 7 for day in weekdays})))
+    return tuple(fields), parts
+
+
+class AlarmRule:
+    """一条按本地时间重复的提醒规则，预先计算下一次触发时刻"""
+
+    __slots__ = ("name", "spec", "minutes", "days", "months", "weekdays",
+                 "_any_day", "_any_weekday", "next_ns", "seq")
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.spec = spec
+        (minutes, hours, days, months, weekdays), parts = parse_rule(spec)
+        # 一天中允许的分钟（0-1439），查找时二分
+        self.minutes = tuple(h * 60 + m for h in hours for m in minutes)
+        self.days = frozenset(days)
+        self.months = frozenset(months)
+        self.weekdays = frozenset(weekdays)
+        # cron语义：日和星期都有限制时满足其一即可（以*开头的字段，包括*/n，不算限制）
+        self._any_day = parts[2].startswith("*")
+        self._any_weekday = parts[4].startswith("*")
+        # 下一次触发的墙上时间（纳秒），没有下一次时为None
+        self.next_ns = None
+        # 当前有效的索引条目序号，用于延迟删除
+        self.seq = None
+
+    def matches_day(self, day):
+        if day.month not in self.months:
+            return False
+        day_ok = day.day in self.days
+        weekday_ok = (day.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, wall_ns):
+        """返回wall_ns之后第一次触发的墙上时间（纳秒），找不到时返回None"""
+        after = wall_ns // NS_PER_SEC
+        tm = time.localtime(after)
+        start = datetime.date(tm.tm_year, tm.tm_mon, tm.tm_mday)
+        # 当前分钟已经开始，从下一分钟找起
+        first = tm.tm_hour * 60 + tm.tm_min + 1
+        for offset in range(_SEARCH_DAYS):
+            day = start + datetime.timedelta(days=offset)
+            if not self.matches_day(day):
+                continue
+            for minute in self.minutes[bisect_left(self.minutes, first if offset == 0 else 0):]:
+                hour, minute = divmod(minute, 60)
+                fire = int(time.mktime((day.year, day.month, day.day, hour, minute, 0, 0, 0, -1)))
+                # 夏令时切换时本地时间可能重复，只接受严格在之后的时刻
+                if fire > after:
+                    return fire * NS_PER_SEC
+        return None
+
+
+class AlarmSchedule:
+    """管理大量重复提醒，按下一次触发时刻建立最小堆索引
+
+    调度只需要查看堆顶；某条规则触发后只重新计算这一条的下一次时刻，
+    删除规则采用延迟删除（与TimerManager相同）。系统时间向回调整时
+    调用rebase()重新计算，向前调整或挂起后错过的提醒在下一次检查时补发一次。
+    """
+
+    def __init__(self, clock=SYSTEM_CLOCK):
+        self.clock = clock
+        self._rules = {}
+        self._heap = []  # (下一次触发的墙上时间, seq, name)
+        self._seq = itertools.count()
+        # 统计：触发次数、重新计算下一次时刻的次数
+        self.fired = 0
+        self.recalculated = 0
+
+    def __len__(self):
+        return len(self._rules)
+
+    def __iter__(self):
+        return iter(self._rules.values())
+
+    def get(self, name):
+        return self._rules.get(name)
+
+    def add(self, name, spec):
+        """添加（或替换）一条规则，返回AlarmRule"""
+        rule = AlarmRule(name, spec)
+        self._rules[name] = rule
+        self._schedule(rule, self.clock.wall_ns())
+        return rule
+
+    def remove(self, name):
+        rule = self._rules.pop(name, None)
+        if rule is None:
+            return False
+        rule.seq = None
+        return True
+
+    def next_fire_ns(self):
+        """返回最早的触发时刻（墙上时间纳秒），没有规则时返回None"""
+        heap = self._heap
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now_ns=None):
+        """取出所有已到时刻的规则名称，并为它们计算下一次触发时刻"""
+        if now_ns is None:
+            now_ns = self.clock.wall_ns()
+        due = []
+        heap = self._heap
+        while heap:
+            if not self._is_live(heap[0]):
+                heapq.heappop(heap)
+                continue
+            fire_ns, seq, name = heap[0]
+            if fire_ns > now_ns:
+                break
+            heapq.heappop(heap)
+            due.append(name)
+            # 从现在算起，跳过期间错过的多次触发
+            self._schedule(self._rules[name], now_ns)
+        self.fired += len(due)
+        return due
+
+    def rebase(self, now_ns=None):
+        """系统时间向回调整后，从当前时间重新计算所有规则的下一次触发时刻"""
+        if now_ns is None:
+            now_ns = self.clock.wall_ns()
+        self._heap = []
+        for rule in self._rules.values():
+            self._schedule(rule, now_ns)
+
+    def report(self):
+        return f"定时提醒: {len(self._rules)}条规则，触发{self.fired}次，计算下一次时刻{self.recalculated}次"
+
+    def _schedule(self, rule, after_ns):
+        self.recalculated += 1
+        rule.next_ns = rule.next_after(after_ns)
+        if rule.next_ns is None:
+            rule.seq = None
+            return
+        rule.seq = next(self._seq)
+        heapq.heappush(self._heap, (rule.next_ns, rule.seq, rule.name))
+
+    def _is_live(self, entry):
+        rule = self._rules.get(entry[2])
+        return rule is not None and rule.seq == entry[1]
+
+
+def parse_alarm_specs(spec):
+    """解析"名称=规则;名称=规则"，或"@文件路径"（每行一条"名称=规则"，#开头为注释）"""
+    if spec.startswith("@"):
+        with open(spec[1:], encoding="utf-8") as f:
+            items = f.read().splitlines()
+    else:
+        items = spec.split(";")
+    rules = []
+    for item in items:
+        item = item.strip()
+        if not item or item.startswith("#"):
+            continue
+        name, sep, rule = item.partition("=")
+        if not sep:
+            raise ValueError(f"提醒规则应写成名称=规则: {item}")
+        rules.append((name.strip(), rule.strip()))
+    return rules
@@ -0,0 +1,219 @@
+import functools
+import tkinter as tk
+
+from auto_fit import ResizeDebouncer
+
+# 七段数码管各段的位：a上 b右上 c右下 d下 e左下 f左上 g中
+SEG_A, SEG_B, SEG_C, SEG_D, SEG_E, SEG_F, SEG_G = (1 << i for i in range(7))
+
+# 字符到段位掩码的预计算表
+SEGMENT_MASKS = {
+    "0": SEG_A | SEG_B | SEG_C | SEG_D | SEG_E | SEG_F,
+    "1": SEG_B | SEG_C,
+    "2": SEG_A | SEG_B | SEG_D | SEG_E | SEG_G,
+    "3": SEG_A | SEG_B | SEG_C | SEG_D | SEG_G,
+    "4": SEG_B | SEG_C | SEG_F | SEG_G,
+    "5": SEG_A | SEG_C | SEG_D | SEG_F | SEG_G,
+    "6": SEG_A | SEG_C | SEG_D | SEG_E | SEG_F | SEG_G,
+    "7": SEG_A | SEG_B | SEG_C,
+    "8": SEG_A | SEG_B | SEG_C | SEG_D | SEG_E | SEG_F | SEG_G,
+    "9": SEG_A | SEG_B | SEG_C | SEG_D | SEG_F | SEG_G,
+    "A": SEG_A | SEG_B | SEG_C | SEG_E | SEG_F | SEG_G,
+    "P": SEG_A | SEG_B | SEG_E | SEG_F | SEG_G,
+    "d": SEG_B | SEG_C | SEG_D | SEG_E | SEG_G,
+    "L": SEG_D | SEG_E | SEG_F,
+    "-": SEG_G,
+    " ": 0,
+}
+
+# 单元格类型：数字格（7段）、冒号格（2点）、小数点格（1点）
+CELL_DIGIT = "digit"
+CELL_COLON = "colon"
+CELL_DOT = "dot"
+
+# 各类单元格宽度（相对数字高度）
+CELL_WIDTHS = {CELL_DIGIT: 0.55, CELL_COLON: 0.25, CELL_DOT: 0.2}
+# 单元格间距、段粗细、段间缝隙（相对数字高度）
+CELL_SPACING = 0.12
+SEGMENT_THICKNESS = 0.11
+SEGMENT_GAP = 0.012
+
+
+def cell_for(char):
+    """返回字符对应的(单元格类型, 掩码)"""
+    if char == ":":
+        return CELL_COLON, 0b11
+    if char == ".":
+        return CELL_DOT, 0b1
+    return CELL_DIGIT, SEGMENT_MASKS.get(char, 0)
+
+
+def layout_width(kinds):
+    """一组单元格的总宽度（相对数字高度）"""
+    if not kinds:
+        return 0.0
+    return sum(CELL_WIDTHS[k] for k in kinds) + CELL_SPACING * (len(kinds) - 1)
+
+
+@functools.lru_cache(maxsize=256)
+def fit_digit_height(kinds, width, height):
+    """返回能把一组单元格放进width x height的数字高度（按参数缓存）"""
+    return max(1.0, min(height * 0.8, width * 0.9 / max(layout_width(kinds), 0.01)))
+
+
+def _horizontal(x0, x1, yc, t):
+    h = t / 2
+    return (x0, yc, x0 + h, yc - h, x1 - h, yc - h, x1, yc, x1 - h, yc + h, x0 + h, yc + h)
+
+
+def _vertical(xc, y0, y1, t):
+    h = t / 2
+    return (xc, y0, xc + h, y0 + h, xc + h, y1 - h, xc, y1, xc - h, y1 - h, xc - h, y0 + h)
+
+
+def digit_polygons(x, y, height):
+    """返回数字格7个段的多边形坐标，顺序与段位a..g一致"""
+    w = height * CELL_WIDTHS[CELL_DIGIT]
+    t = height * SEGMENT_THICKNESS
+    g = height * SEGMENT_GAP
+    left, right = x + t / 2, x + w - t / 2
+    top, mid, bottom = y + t / 2, y + height / 2, y + height - t / 2
+    return [
+        _horizontal(left + g, right - g, top, t),     # a
+        _vertical(right, top + g, mid - g, t),        # b
+        _vertical(right, mid + g, bottom - g, t),     # c
+        _horizontal(left + g, right - g, bottom, t),  # d
+        _vertical(left, mid + g, bottom - g, t),      # e
+        _vertical(left, top + g, mid - g, t),         # f
+        _horizontal(left + g, right - g, mid, t),     # g
+    ]
+
+
+def dot_boxes(kind, x, y, height):
+    """返回冒号格/小数点格各点的矩形坐标"""
+    w = height * CELL_WIDTHS[kind]
+    size = height * SEGMENT_THICKNESS * 1.2
+    cx = x + w / 2
+    if kind == CELL_COLON:
+        centers = (y + height * 0.3, y + height * 0.7)
+    else:
+        centers = (y + height - size / 2,)
+    return [(cx - size / 2, cy - size / 2, cx + size / 2, cy + size / 2) for cy in centers]
+
+
+class SegmentDisplay(tk.Canvas):
+    """在Canvas上绘制的七段数码管显示
+
+    每段是一个常驻的多边形，刷新时只修改状态发生变化的段的颜色；
+    只有单元格组成（如HH:MM变为HH:MM:SS）或尺寸变化时才重新布局，
+    拖动改变窗口大小时等尺寸稳定后才重新布局一次。
+    收到第一次<Configure>之前不知道实际尺寸，这时的文本留到第一次<Configure>时
+    按实际尺寸画出，不会先按Canvas的默认尺寸画一遍再重画。
+    """
+
+    # 布局后各单元格的初始掩码（与新建item的显示状态一致）
+    initial_mask = 0
+
+    def __init__(self, master, fg='#00FF00', bg='#000000', off_color=None, **kwargs):
+        super().__init__(master, bg=bg, highlightthickness=0, bd=0, **kwargs)
+        self.on_color = fg
+        # 熄灭段的颜色，默认与背景相同（不显示）
+        self.off_color = off_color or bg
+        self.last_text = None
+        self._kinds = ()      # 当前各单元格类型
+        self._items = []      # 每个单元格的段item id列表
+        self._masks = []      # 每个单元格当前点亮的段位
+        self._size = (0, 0)   # 布局时的画布尺寸
+        # 计算的帧数、实际提交的帧数、切换颜色的段数
+        self.frames_computed = 0
+        self.frames_committed = 0
+        self.segments_toggled = 0
+        self._deferred_text = None  # 收到第一次<Configure>之前提交的文本
+        self.resizer = ResizeDebouncer(self, self._on_resize)
+        # 第一次<Configure>给出实际尺寸，立即布局，不等待防抖
+        self.resizer.expect_jump()
+
+    def render(self, text):
+        """提交一帧，只修改状态变化的段，返回是否实际更新了显示"""
+        self.frames_computed += 1
+        if text == self.last_text:
+            return False
+        if self.resizer.size is None:
+            self._deferred_text = text
+            return False
+        cells = [cell_for(c) for c in text]
+        kinds = tuple(kind for kind, _ in cells)
+        if kinds != self._kinds:
+            self._layout(kinds)
+        masks = self._masks
+        for index, (kind, mask) in enumerate(cells):
+            if mask != masks[index]:
+                self._draw_cell(index, kind, mask)
+                masks[index] = mask
+        self.last_text = text
+        self.frames_committed += 1
+        return True
+
+    def _draw_cell(self, index, kind, mask):
+        # 只修改与当前状态不同的段
+        configure = self.itemconfigure
+        on, off = self.on_color, self.off_color
+        items = self._items[index]
+        changed = mask ^ self._masks[index]
+        bit = 0
+        while changed:
+            if changed & 1:
+                configure(items[bit], fill=on if mask >> bit & 1 else off)
+                self.segments_toggled += 1
+            changed >>= 1
+            bit += 1
+
+    def invalidate(self):
+        """下一帧重新布局并完整绘制"""
+        self.last_text = None
+        self._kinds = ()
+
+    def digit_height(self, kinds, width, height):
+        """返回能放进width x height的数字高度"""
+        return fit_digit_height(kinds, width, height)
+
+    def _layout(self, kinds):
+        # 按当前画布尺寸重新创建全部段
+        self.delete("all")
+        width, height = self.resizer.size
+        self._size = (width, height)
+        digit_h = self.digit_height(kinds, width, height)
+        x = (width - layout_width(kinds) * digit_h) / 2
+        y = (height - digit_h) / 2
+        self._items = []
+        for kind in kinds:
+            self._items.append(self._create_cell(kind, x, y, digit_h))
+            x += (CELL_WIDTHS[kind] + CELL_SPACING) * digit_h
+        self._kinds = kinds
+        self._masks = [self.initial_mask] * len(kinds)
+
+    def _create_cell(self, kind, x, y, digit_h):
+        # 创建一个单元格的全部段（初始为熄灭状态）
+        off = self.off_color
+        if kind == CELL_DIGIT:
+            return [self.create_polygon(p, fill=off, outline="") for p in digit_polygons(x, y, digit_h)]
+        return [self.create_rectangle(b, fill=off, outline="") for b in dot_boxes(kind, x, y, digit_h)]
+
+    def _on_resize(self, width, height):
+        # 尺寸稳定后按新尺寸重新布局（第一次收到尺寸时画出之前提交的文本）
+        text = self.last_text if self.last_text is not None else self._deferred_text
+        if (width, height) != self._size and text is not None:
+            self._deferred_text = None
+            self.invalidate()
+            self.render(text)
+
+    def stats(self):
+        return {
+            "frames_computed": self.frames_computed,
+            "frames_committed": self.frames_committed,
+            "segments_toggled": self.segments_toggled,
+        }
+
+    def report(self):
+        return (f"计算帧数: {self.frames_computed}，提交帧数: {self.frames_committed}，"
+                f"切换段数: {self.segments_toggled}")
@@ -0,0 +1,212 @@
+import datetime
+import os
+import sys
+
+from time_format import format_duration
+from clock_source import SYSTEM_CLOCK, NS_PER_SEC
+
+# 默认历史数据库路径
+DEFAULT_HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".digital_clock_history.sqlite3")
+
+# 汇总表中代表"全部标签"的键
+ALL_TAGS = "*"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,          -- timer 或 countdown
+    tag TEXT NOT NULL DEFAULT '',
+    started_at REAL NOT NULL,    -- Unix时间戳（秒）
+    ended_at REAL NOT NULL,
+    duration_ns INTEGER NOT NULL,
+    day TEXT NOT NULL,           -- 结束时的本地日期 YYYY-MM-DD
+    week TEXT NOT NULL           -- 结束时的ISO周 YYYY-Www
+);
+CREATE INDEX IF NOT EXISTS sessions_day ON sessions (day);
+CREATE INDEX IF NOT EXISTS sessions_tag_day ON sessions (tag, day);
+CREATE TABLE IF NOT EXISTS totals (
+    period TEXT NOT NULL,        -- 日期 YYYY-MM-DD 或ISO周 YYYY-Www
+    tag TEXT NOT NULL,           -- 标签，ALL_TAGS表示全部
+    total_ns INTEGER NOT NULL,
+    sessions INTEGER NOT NULL,
+    PRIMARY KEY (period, tag)
+) WITHOUT ROWID;
+"""
+
+
+def day_key(timestamp):
+    return datetime.date.fromtimestamp(timestamp).isoformat()
+
+
+def week_key(timestamp):
+    year, week, _ = datetime.date.fromtimestamp(timestamp).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class SessionHistory:
+    """已完成的正向计时/倒计时记录
+
+    每条记录写入时同步累加按日、按周（以及按标签）的汇总，
+    查询某天或某周的总时长只读一行汇总，不扫描记录。
+    记录的时刻和默认的"今天"、"本周"都按clock的墙上时间计算。
+    数据库在第一次读写时才打开（时钟启动时不导入sqlite3）。
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_FILE, clock=SYSTEM_CLOCK):
+        self.path = path
+        self.clock = clock
+        self._db = None
+        # 为True时record()只暂存记录，flush()时在一个事务中写入
+        self.batching = False
+        self._pending = []
+
+    @property
+    def db(self):
+        if self._db is None:
+            import sqlite3
+            db = sqlite3.connect(self.path)
+            db.executescript(SCHEMA)
+            self._db = db
+        return self._db
+
+    def close(self):
+        if self._db is None and not self._pending:
+            return
+        self.flush()
+        self._db.close()
+        self._db = None
+
+    # ---- 写入 ----
+
+    def record(self, kind, duration_ns, ended_at=None, tag=""):
+        """记录一次完成的计时，开始时间按结束时间减去时长推算"""
+        if duration_ns <= 0:
+            return
+        if ended_at is None:
+            ended_at = self.now()
+        started_at = ended_at - duration_ns / NS_PER_SEC
+        self._pending.append((kind, tag, started_at, ended_at, duration_ns, day_key(ended_at), week_key(ended_at)))
+        if not self.batching:
+            self.flush()
+
+    def now(self):
+        """当前的Unix时间戳（秒）"""
+        return self.clock.wall_ns() / NS_PER_SEC
+
+    def flush(self):
+        """在一个事务中写入暂存的记录，同时累加汇总"""
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        rollups = []
+        for kind, tag, started_at, ended_at, duration_ns, day, week in rows:
+            rollups += [(day, ALL_TAGS, duration_ns), (week, ALL_TAGS, duration_ns)]
+            if tag:
+                rollups += [(day, tag, duration_ns), (week, tag, duration_ns)]
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO sessions (kind, tag, started_at, ended_at, duration_ns, day, week)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.db.executemany(
+                "INSERT INTO totals (period, tag, total_ns, sessions) VALUES (?, ?, ?, 1)"
+                " ON CONFLICT (period, tag) DO UPDATE SET"
+                " total_ns = total_ns + excluded.total_ns, sessions = sessions + 1",
+                rollups,
+            )
+
+    # ---- 查询 ----
+
+    def total(self, period, tag=None):
+        """返回某个汇总周期的(总时长纳秒, 记录数)"""
+        row = self.db.execute(
+            "SELECT total_ns, sessions FROM totals WHERE period = ? AND tag = ?",
+            (period, tag or ALL_TAGS),
+        ).fetchone()
+        return row if row else (0, 0)
+
+    def day_total(self, day=None, tag=None):
+        """某天（默认今天）的总时长（纳秒）"""
+        return self.total(day or day_key(self.now()), tag)[0]
+
+    def week_total(self, week=None, tag=None):
+        """某ISO周（默认本周）的总时长（纳秒）"""
+        return self.total(week or week_key(self.now()), tag)[0]
+
+    def sessions(self, day=None, tag=None, since_day=None):
+        """按记录顺序逐条返回记录（字典），不一次性读入全部结果"""
+        query = "SELECT id, kind, tag, started_at, ended_at, duration_ns, day FROM sessions"
+        conditions, params = [], []
+        if day:
+            conditions.append("day = ?")
+            params.append(day)
+        if since_day:
+            conditions.append("day >= ?")
+            params.append(since_day)
+        if tag is not None:
+            conditions.append("tag = ?")
+            params.append(tag)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY id"
+        columns = ("id", "kind", "tag", "started_at", "ended_at", "duration_ns", "day")
+        for row in self.db.execute(query, params):
+            yield dict(zip(columns, row))
+
+    def export(self, out, fmt="csv", **filters):
+        """把记录以CSV或JSON Lines格式流式写入out，返回写出的条数"""
+        # 只在导出时才需要的模块，不增加时钟的启动时间
+        import csv
+        import json
+        count = 0
+        if fmt == "csv":
+            writer = None
+            for session in self.sessions(**filters):
+                if writer is None:
+                    writer = csv.DictWriter(out, fieldnames=list(session))
+                    writer.writeheader()
+                writer.writerow(session)
+                count += 1
+        else:
+            for session in self.sessions(**filters):
+                out.write(json.dumps(session, ensure_ascii=False) + "\n")
+                count += 1
+        return count
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="数码管时钟计时历史")
+    parser.add_argument("--db", default=DEFAULT_HISTORY_FILE, help="历史数据库路径")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="导出计时记录")
+    export_parser.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    export_parser.add_argument("--day", help="只导出某天的记录 (YYYY-MM-DD)")
+    export_parser.add_argument("--since", help="只导出某天之后的记录 (YYYY-MM-DD)")
+    export_parser.add_argument("--tag", help="只导出某个标签的记录")
+    export_parser.add_argument("-o", "--output", help="输出文件，默认标准输出")
+
+    totals_parser = sub.add_parser("totals", help="显示今天和本周的总时长")
+    totals_parser.add_argument("--tag", help="只统计某个标签")
+
+    args = parser.parse_args(argv)
+    history = SessionHistory(args.db)
+    try:
+        if args.command == "export":
+            out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+            try:
+                history.export(out, args.format, day=args.day, tag=args.tag, since_day=args.since)
+            finally:
+                if args.output:
+                    out.close()
+        else:
+            print(f"今天: {format_duration(history.day_total(tag=args.tag))}")
+            print(f"本周: {format_duration(history.week_total(tag=args.tag))}")
+    finally:
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
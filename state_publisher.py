@@ -0,0 +1,209 @@
+import mmap
+import os
+import struct
+import time
+from collections import namedtuple
+
+
+def _state_dir():
+    # Linux放在内存文件系统/dev/shm中，其他系统放在临时目录
+    if os.path.isdir("/dev/shm"):
+        return "/dev/shm"
+    import tempfile
+    return tempfile.gettempdir()
+
+
+def _user_suffix():
+    # 每个用户使用自己的状态文件
+    if hasattr(os, "getuid"):
+        return str(os.getuid())
+    return os.environ.get("USERNAME", "user")
+
+
+# 共享状态文件
+DEFAULT_STATE_FILE = os.path.join(_state_dir(), "digital_clock_state_" + _user_suffix())
+
+
+def state_path(spec):
+    """把DIGIT_CLOCK_SHM的值换算为状态文件路径，未开启（空或off）时返回None，1表示默认路径"""
+    if not spec or spec == "off":
+        return None
+    return DEFAULT_STATE_FILE if spec == "1" else spec
+
+MAGIC = b"DCLK"
+VERSION = 1
+
+# 固定布局（小端）：
+#   头部  magic(4s) version(I) seq(Q)
+#   数据  mode(B) running(B) expired(B) precision(B) 保留(4x)
+#         elapsed_ns(q) remaining_ns(q) laps(Q) last_lap_ns(q)
+#         published_wall_ns(q) published_mono_ns(q) text(32s)
+HEADER = struct.Struct("<4sIQ")
+PAYLOAD = struct.Struct("<BBBB4xqqQqqq32s")
+SEQ_OFFSET = 8
+PAYLOAD_OFFSET = HEADER.size
+SIZE = HEADER.size + PAYLOAD.size
+_SEQ = struct.Struct("<Q")
+
+# 读者遇到写入时先忙等重试的次数，之后每次重试休眠，总等待超过上限时放弃
+SPIN_RETRIES = 1000
+RETRY_SLEEP = 0.001
+READ_TIMEOUT = 0.5
+
+MODES = ("clock", "timer", "countdown")
+_MODE_CODES = {name: code for code, name in enumerate(MODES)}
+
+# 读取到的状态
+PublishedState = namedtuple("PublishedState", [
+    "mode", "running", "expired", "precision", "elapsed_ns", "remaining_ns",
+    "laps", "last_lap_ns", "published_wall_ns", "published_mono_ns", "text",
+])
+
+
+class StatePublisher:
+    """把计时状态写入固定布局的内存映射文件，供其他进程读取
+
+    用顺序锁（seqlock）保护：写入前把序号加1变为奇数，写完再加1变为偶数，
+    读者在序号为偶数且读取前后不变时才接受读到的数据，写者从不等待读者。
+    同一个文件只能由一个时钟发布：打开后加独占的建议锁，已被其他时钟占用时抛出RuntimeError；
+    close()只删除本实例持有（或创建）的文件。
+    """
+
+    def __init__(self, path=DEFAULT_STATE_FILE):
+        self.path = path
+        created = not os.path.exists(path)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            self._owned = self._lock(fd) or created
+            os.ftruncate(fd, SIZE)
+            self._map = mmap.mmap(fd, SIZE)
+        except BaseException:
+            os.close(fd)
+            raise
+        # 保持文件打开以持有锁，直到close()
+        self._fd = fd
+        self._seq = 0
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, self._seq)
+        self.published = 0
+
+    def _lock(self, fd):
+        """对文件加独占锁，返回是否加锁成功（没有fcntl的系统返回False）"""
+        try:
+            import fcntl
+        except ImportError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise RuntimeError(f"状态文件{self.path}正被另一个时钟使用") from None
+        return True
+
+    def publish(self, engine, text=""):
+        """发布引擎的当前状态"""
+        snapshot = engine.snapshot()
+        last_lap = engine.laps.last_lap_ns
+        buffer = self._map
+        self._seq += 1
+        _SEQ.pack_into(buffer, SEQ_OFFSET, self._seq)
+        PAYLOAD.pack_into(
+            buffer, PAYLOAD_OFFSET,
+            _MODE_CODES.get(snapshot.mode, 0), snapshot.running, snapshot.expired, engine.precision,
+            snapshot.elapsed_ns, snapshot.remaining_ns,
+            len(engine.laps), last_lap if last_lap is not None else -1,
+            time.time_ns(), time.monotonic_ns(),
+            text.encode("utf-8")[:32],
+        )
+        self._seq += 1
+        _SEQ.pack_into(buffer, SEQ_OFFSET, self._seq)
+        self.published += 1
+
+    def close(self, remove=True):
+        self._map.close()
+        # 在释放锁之前删除，不会删掉其他时钟随后创建的文件
+        if remove and self._owned:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+        os.close(self._fd)
+
+
+class StateReader:
+    """读取StatePublisher发布的状态，不加锁也不与时钟进程通信"""
+
+    def __init__(self, path=DEFAULT_STATE_FILE):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), SIZE, access=mmap.ACCESS_READ)
+        magic, version, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"不是数码管时钟的状态文件: {path}")
+        # 读取时遇到写入而重试的次数
+        self.retries = 0
+
+    def read(self, timeout=READ_TIMEOUT):
+        """返回一致的PublishedState
+
+        写者在写入途中退出时序号会一直是奇数，等待超过timeout秒后抛出TimeoutError。
+        """
+        buffer = self._map
+        attempts = 0
+        deadline = None
+        while True:
+            before = _SEQ.unpack_from(buffer, SEQ_OFFSET)[0]
+            if not before & 1:
+                values = PAYLOAD.unpack_from(buffer, PAYLOAD_OFFSET)
+                if _SEQ.unpack_from(buffer, SEQ_OFFSET)[0] == before:
+                    break
+            # 正在写入
+            self.retries += 1
+            attempts += 1
+            if attempts > SPIN_RETRIES:
+                if deadline is None:
+                    deadline = time.monotonic() + timeout
+                elif time.monotonic() >= deadline:
+                    raise TimeoutError(f"状态文件{self.path}一直处于写入中，发布进程可能已异常退出")
+                time.sleep(RETRY_SLEEP)
+        (mode, running, expired, precision, elapsed, remaining,
+         laps, last_lap, wall_ns, mono_ns, text) = values
+        return PublishedState(
+            MODES[mode] if mode < len(MODES) else "clock", bool(running), bool(expired), bool(precision),
+            elapsed, remaining, laps, None if last_lap < 0 else last_lap,
+            wall_ns, mono_ns, text.rstrip(b"\0").decode("utf-8", "replace"),
+        )
+
+    def current(self):
+        """返回按发布后经过的时间推算到现在的(已计时, 剩余)纳秒数
+
+        时钟进程只在显示变化时发布，运行中的计时在两次发布之间由读者自行推算。
+        """
+        state = self.read()
+        elapsed, remaining = state.elapsed_ns, state.remaining_ns
+        if state.running:
+            passed = time.monotonic_ns() - state.published_mono_ns
+            if state.mode == "timer":
+                elapsed += passed
+            elif state.mode == "countdown":
+                remaining = max(0, remaining - passed)
+        return elapsed, remaining
+
+    def close(self):
+        self._map.close()
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="读取运行中的数码管时钟发布的状态")
+    parser.add_argument("--path", default=state_path(os.environ.get("DIGIT_CLOCK_SHM")) or DEFAULT_STATE_FILE)
+    args = parser.parse_args(argv)
+    reader = StateReader(args.path)
+    state = reader.read()
+    elapsed, remaining = reader.current()
+    print(f"模式: {state.mode}，{'运行中' if state.running else '未运行'}，显示: {state.text}")
+    print(f"已计时: {elapsed / 1e9:.3f}s，剩余: {remaining / 1e9:.3f}s，分圈: {state.laps}")
+    reader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import math
+import time
+
+from clock_source import SYSTEM_CLOCK, NS_PER_SEC, NS_PER_MS
+from instrumentation import Histogram, LATENESS_BUCKETS_MS
+
+# 触发时刻额外推迟的余量（秒），确保回调落在显示变化的边界之后
+TICK_SLACK = 0.002
+# 显示内容不会变化时（如计时暂停）的空闲刷新间隔（秒）
+IDLE_TICK = 60.0
+
+
+def seconds_to_boundary(value, period):
+    """返回value到下一个period整数倍边界的距离（秒）"""
+    return period - (value % period)
+
+
+class TickScheduler:
+    """按显示内容下一次变化的时刻调度刷新，代替固定的after(1000)循环
+
+    clock为时钟来源（见clock_source.py），只用于计算触发延迟统计。
+    """
+
+    def __init__(self, widget, callback, clock=SYSTEM_CLOCK):
+        self.widget = widget
+        self.callback = callback
+        self.clock = clock
+        self._after_id = None
+        self._due = None  # 预期触发时刻（clock.monotonic_ns）
+        # 触发延迟统计（毫秒）
+        self.tick_count = 0
+        self.last_lateness_ms = 0.0
+        self.max_lateness_ms = 0.0
+        self.total_lateness_ms = 0.0
+        # 触发延迟分布（毫秒）
+        self.lateness = Histogram(LATENESS_BUCKETS_MS)
+
+    def schedule(self, delay):
+        """在delay秒后触发回调，覆盖之前尚未触发的调度"""
+        self.cancel()
+        delay_ms = max(1, math.ceil((delay + TICK_SLACK) * 1000))
+        self._due = self.clock.monotonic_ns() + delay_ms * NS_PER_MS
+        self._after_id = self.widget.after(delay_ms, self._fire)
+
+    def cancel(self):
+        """取消尚未触发的调度"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+            self._due = None
+
+    def kick(self):
+        """状态改变时立即刷新一次，回调会重新调度下一次刷新"""
+        self.cancel()
+        self.callback()
+
+    def _fire(self):
+        lateness = (self.clock.monotonic_ns() - self._due) / NS_PER_MS
+        self._after_id = None
+        self._due = None
+        self.tick_count += 1
+        self.last_lateness_ms = lateness
+        self.max_lateness_ms = max(self.max_lateness_ms, lateness)
+        self.total_lateness_ms += lateness
+        self.lateness.observe(lateness)
+        self.callback()
+
+    def stats(self):
+        """返回触发次数和触发延迟统计"""
+        mean = self.total_lateness_ms / self.tick_count if self.tick_count else 0.0
+        return {
+            "ticks": self.tick_count,
+            "last_lateness_ms": self.last_lateness_ms,
+            "max_lateness_ms": self.max_lateness_ms,
+            "mean_lateness_ms": mean,
+        }
+
+    def report(self):
+        """返回可读的延迟统计文本"""
+        s = self.stats()
+        return (f"刷新次数: {s['ticks']}，平均延迟: {s['mean_lateness_ms']:.2f}ms，"
+                f"最大延迟: {s['max_lateness_ms']:.2f}ms，最近延迟: {s['last_lateness_ms']:.2f}ms")
+
+
+class DeadlineTimer:
+    """在指定的单调时钟时刻（clock.monotonic_ns）触发一次回调"""
+
+    def __init__(self, widget, callback, clock=SYSTEM_CLOCK):
+        self.widget = widget
+        self.callback = callback
+        self.clock = clock
+        self.deadline_ns = None
+        self._after_id = None
+        # 最近一次触发相对到期时刻的延迟（毫秒）
+        self.last_lateness_ms = 0.0
+
+    @property
+    def armed(self):
+        return self.deadline_ns is not None
+
+    def arm(self, deadline_ns):
+        """设置到期时刻，覆盖之前尚未触发的设置"""
+        self.cancel()
+        self.deadline_ns = deadline_ns
+        self._arm()
+
+    def cancel(self):
+        """取消尚未触发的到期回调"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self.deadline_ns = None
+
+    def _arm(self):
+        remaining_ns = self.deadline_ns - self.clock.monotonic_ns()
+        # 向上取整到毫秒，避免提前触发
+        delay_ms = max(0, -(-remaining_ns // NS_PER_MS))
+        self._after_id = self.widget.after(delay_ms, self._fire)
+
+    def _fire(self):
+        self._after_id = None
+        now = self.clock.monotonic_ns()
+        if now < self.deadline_ns:
+            # Tk的定时器可能略早于单调时钟触发，补足剩余时间
+            self._arm()
+            return
+        self.last_lateness_ms = (now - self.deadline_ns) / NS_PER_MS
+        self.deadline_ns = None
+        self.callback()
+
+
+# 高精度秒表帧循环的默认目标帧率（常见显示器刷新率）、最低帧率和CPU预算（占一个核心的比例）
+DEFAULT_FPS = 60
+MIN_FPS = 10
+CPU_BUDGET = 0.10
+
+
+# 画第一帧期间（还没有调度下一帧）FramePacer._after_id的占位值
+_STARTING = "starting"
+
+
+class FramePacer:
+    """按显示帧率重复调用回调的帧循环（用于高精度秒表）
+
+    帧时刻落在以开始时刻为起点、间隔为1/fps的网格上（clock.precise_ns），
+    错过的网格点计为丢帧，不补画；每秒用time.process_time_ns检查一次CPU占用，
+    超过预算时按比例降低帧率，远低于预算时逐步恢复到目标帧率。
+    """
+
+    def __init__(self, widget, callback, fps=DEFAULT_FPS, cpu_budget=CPU_BUDGET, min_fps=MIN_FPS,
+                 clock=SYSTEM_CLOCK):
+        self.widget = widget
+        self.callback = callback
+        self.clock = clock
+        self.target_fps = fps
+        self.fps = fps
+        self.cpu_budget = cpu_budget
+        self.min_fps = min_fps
+        self._after_id = None
+        self._origin = 0
+        self._frame = 0
+        self._window_start = None  # (clock.precise_ns, process_time_ns)
+        # 统计：画出的帧数、丢帧数、累计运行时间（纳秒）、最近一次测得的CPU占用
+        self.frames = 0
+        self.dropped_frames = 0
+        self.running_ns = 0
+        self.cpu_fraction = 0.0
+        # 每帧相对网格时刻的延迟分布（毫秒）
+        self.lateness = Histogram(LATENESS_BUCKETS_MS)
+
+    @property
+    def running(self):
+        return self._after_id is not None
+
+    def start(self):
+        """开始帧循环，立即画出第一帧"""
+        if self.running:
+            return
+        now = self.clock.precise_ns()
+        self._restart_grid(now)
+        self._window_start = (now, time.process_time_ns())
+        # 画第一帧时回调已能看到帧循环在运行，不会再调度一次普通刷新
+        self._after_id = _STARTING
+        self._fire()
+
+    def stop(self):
+        """停止帧循环"""
+        if self._after_id is not None:
+            if self._after_id is not _STARTING:
+                self.widget.after_cancel(self._after_id)
+            self._after_id = None
+            self._close_window(self.clock.precise_ns())
+
+    def _restart_grid(self, now):
+        self._origin = now
+        self._frame = 0
+
+    def _schedule(self):
+        period = NS_PER_SEC // self.fps
+        target = self._origin + self._frame * period
+        delay_ms = max(1, -(-(target - self.clock.precise_ns()) // NS_PER_MS))
+        self._after_id = self.widget.after(delay_ms, self._fire)
+
+    def _fire(self):
+        now = self.clock.precise_ns()
+        period = NS_PER_SEC // self.fps
+        self.lateness.observe((now - self._origin - self._frame * period) / NS_PER_MS)
+        # 当前时刻所在的网格点，跳过的网格点都是丢掉的帧
+        index = (now - self._origin) // period
+        if index > self._frame:
+            self.dropped_frames += index - self._frame
+            self._frame = index
+        self.frames += 1
+        self.callback()
+        if self._after_id is None:
+            # 回调中停止了帧循环
+            return
+        self._frame += 1
+        if now - self._window_start[0] >= NS_PER_SEC:
+            self._check_budget(now)
+        self._schedule()
+
+    def _close_window(self, now):
+        # 结束一个统计窗口，返回窗口内的CPU占用
+        start_wall, start_cpu = self._window_start
+        wall = now - start_wall
+        self.running_ns += wall
+        cpu = time.process_time_ns() - start_cpu
+        self._window_start = (now, time.process_time_ns())
+        return cpu / wall if wall > 0 else 0.0
+
+    def _check_budget(self, now):
+        self.cpu_fraction = self._close_window(now)
+        fps = self.fps
+        if self.cpu_fraction > self.cpu_budget:
+            fps = max(self.min_fps, int(fps * self.cpu_budget / self.cpu_fraction))
+        elif self.cpu_fraction < self.cpu_budget / 2:
+            fps = min(self.target_fps, fps * 2)
+        if fps != self.fps:
+            # 以本帧为起点按新帧率重新排列网格
+            self.fps = fps
+            self._restart_grid(now)
+            self._frame = 1
+
+    def stats(self):
+        """返回帧循环统计"""
+        running_ns = self.running_ns
+        if self.running:
+            running_ns += self.clock.precise_ns() - self._window_start[0]
+        achieved = self.frames * NS_PER_SEC / running_ns if running_ns else 0.0
+        return {
+            "frames": self.frames,
+            "dropped_frames": self.dropped_frames,
+            "fps": self.fps,
+            "achieved_fps": achieved,
+            "cpu_fraction": self.cpu_fraction,
+        }
+
+    def report(self):
+        """返回可读的帧循环统计文本"""
+        s = self.stats()
+        return (f"高精度帧数: {s['frames']}，实际帧率: {s['achieved_fps']:.1f}fps，"
+                f"丢帧: {s['dropped_frames']}，当前目标帧率: {s['fps']}fps，"
+                f"CPU占用: {s['cpu_fraction'] * 100:.1f}%")
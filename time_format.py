@@ -0,0 +1,132 @@
+import re
+import time
+from operator import itemgetter
+
+from clock_source import NS_PER_SEC
+
+# 00..99的两位数字文本表，格式化时直接查表，不再逐次调用f-string
+TWO_DIGITS = tuple(f"{i:02d}" for i in range(100))
+# 0..9的一位数字文本表
+ONE_DIGIT = tuple(str(i) for i in range(10))
+
+# 12小时制的小时表（0点显示为12）和上午/下午标记（七段显示的A/P）
+HOURS_12 = tuple(TWO_DIGITS[(h % 12) or 12] for h in range(24))
+AM_PM = tuple("A" if h < 12 else "P" for h in range(24))
+
+# 格式中的字段，其余字符原样输出
+#   HH 小时(24小时制；计时超过99小时时前面显示天数，如"4d03:12:45")
+#   hh 小时(12小时制)  AP 上午/下午(A/P)
+#   MM 分钟  SS 秒  t 十分之一秒  cc 百分之一秒
+_TOKENS = re.compile(r"HH|hh|MM|SS|AP|cc|t")
+# 格式化时各字段文本在值元组中的位置
+_FIELD_ORDER = ("HH", "hh", "AP", "MM", "SS", "t", "cc")
+
+# 各字段决定的显示分辨率（纳秒）
+_RESOLUTION = {
+    "HH": 3600 * NS_PER_SEC, "hh": 3600 * NS_PER_SEC, "AP": 3600 * NS_PER_SEC,
+    "MM": 60 * NS_PER_SEC, "SS": NS_PER_SEC,
+    "t": NS_PER_SEC // 10, "cc": NS_PER_SEC // 100,
+}
+
+# 常用格式
+CLOCK_24 = "HH:MM"
+CLOCK_24_SECONDS = "HH:MM:SS"
+CLOCK_12 = "hh:MMAP"
+CLOCK_12_SECONDS = "hh:MM:SSAP"
+TIMER_SECONDS = "HH:MM:SS"
+TIMER_TENTHS = "HH:MM:SS.t"
+TIMER_HUNDREDTHS = "HH:MM:SS.cc"
+
+
+class TimeFormat:
+    """编译后的时间格式
+
+    创建时把格式文本解析成"%s"模板和字段列表，格式化时只做一次拆分
+    和若干次查表，再用模板拼接。同一个格式可用于时刻（clock）和时长（duration）。
+    """
+
+    __slots__ = ("pattern", "fields", "resolution_ns", "_template", "_pick",
+                 "_days", "_clock_second", "_clock_values")
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.fields = tuple(_TOKENS.findall(pattern))
+        if not self.fields:
+            raise ValueError(f"时间格式中没有任何字段: {pattern!r}")
+        # 模板中的原样文本需要转义%
+        self._template = _TOKENS.sub("%s", pattern.replace("%", "%%"))
+        # 从值元组中按格式顺序取出字段文本
+        pick = itemgetter(*[_FIELD_ORDER.index(f) for f in self.fields])
+        self._pick = pick if len(self.fields) > 1 else (lambda values: (pick(values),))
+        # 显示内容变化的最小间隔
+        self.resolution_ns = min(_RESOLUTION[f] for f in self.fields)
+        # 超过99小时的计时在最前面加天数（只对以HH开头的格式）
+        self._days = pattern.startswith("HH")
+        self._clock_second = None
+        self._clock_values = None
+
+    def __repr__(self):
+        return f"TimeFormat({self.pattern!r})"
+
+    def duration(self, ns):
+        """格式化一段时长（纳秒，负数按0处理）"""
+        if ns < 0:
+            ns = 0
+        total_seconds, sub = divmod(ns, NS_PER_SEC)
+        total_minutes, seconds = divmod(total_seconds, 60)
+        hours, minutes = divmod(total_minutes, 60)
+        prefix = ""
+        if hours > 99 and self._days:
+            days, hours = divmod(hours, 24)
+            prefix = f"{days}d"
+        values = (
+            TWO_DIGITS[hours] if hours < 100 else str(hours),
+            HOURS_12[hours % 24],
+            AM_PM[hours % 24],
+            TWO_DIGITS[minutes],
+            TWO_DIGITS[seconds],
+            ONE_DIGIT[sub // 100000000],
+            TWO_DIGITS[sub // 10000000],
+        )
+        return prefix + self._template % self._pick(values)
+
+    def clock(self, ns=None):
+        """格式化当前本地时刻（ns为time.time_ns()的值）"""
+        if ns is None:
+            ns = time.time_ns()
+        second, sub = divmod(ns, NS_PER_SEC)
+        if second != self._clock_second:
+            # 每秒只调用一次localtime，并缓存该秒的字段文本
+            tm = time.localtime(second)
+            hour = tm.tm_hour
+            self._clock_values = (
+                TWO_DIGITS[hour],
+                HOURS_12[hour],
+                AM_PM[hour],
+                TWO_DIGITS[tm.tm_min],
+                # 闰秒（tm_sec为60）按59显示
+                TWO_DIGITS[min(tm.tm_sec, 59)],
+            )
+            self._clock_second = second
+        values = self._clock_values
+        if self.resolution_ns < NS_PER_SEC:
+            values += (ONE_DIGIT[sub // 100000000], TWO_DIGITS[sub // 10000000])
+        else:
+            values += ("0", "00")
+        return self._template % self._pick(values)
+
+
+_compiled = {}
+
+
+def compile_format(pattern):
+    """返回格式对应的TimeFormat（同一格式只编译一次）"""
+    fmt = _compiled.get(pattern)
+    if fmt is None:
+        fmt = _compiled[pattern] = TimeFormat(pattern)
+    return fmt
+
+
+def format_duration(ns, pattern=TIMER_SECONDS):
+    """按格式格式化一段时长（纳秒）"""
+    return compile_format(pattern).duration(ns)
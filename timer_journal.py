@@ -0,0 +1,196 @@
+import json
+import os
+import time
+
+from clock_source import NS_PER_SEC
+
+# 日志记录类型，每行一条："<类型> <值>"
+START = "S"      # 开始正向计时，值为开始时的累计纳秒
+PAUSE = "P"      # 暂停正向计时，值为累计纳秒
+RESET = "R"      # 重置正向计时
+COUNTDOWN = "C"  # 设置倒计时/暂停倒计时，值为剩余纳秒
+MODE = "M"       # 切换模式，值为模式名称
+
+MODES = ("clock", "timer", "countdown")
+
+
+def _lines_backwards(data, end):
+    """从data[:end]的末尾向前逐行返回解码后的记录，不拆分整个日志"""
+    end -= 1  # 跳过最后一行的换行符
+    while end > 0:
+        start = data.rfind(b"\n", 0, end) + 1
+        yield data[start:end].decode("utf-8", "replace")
+        end = start - 1
+
+
+class TimerJournal:
+    """计时数据的追加式日志
+
+    每次操作只向日志末尾追加一行，按批次或时间间隔fsync；
+    日志过长时把当前状态原子地写成快照文件并清空日志。
+    每条记录都保存绝对值，重复回放同一段日志结果不变。
+    """
+
+    def __init__(self, snapshot_path, journal_path=None, sync_interval=1.0,
+                 sync_batch=32, compact_after=1000):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or os.path.splitext(snapshot_path)[0] + ".journal"
+        self.sync_interval = sync_interval
+        self.sync_batch = sync_batch
+        self.compact_after = compact_after
+        self.state = self.default_state()
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._records = 0  # 当前日志中的记录数
+        # 为True时追加不按批次/间隔fsync，由调用方在一批操作结束后调用sync()
+        self.batching = False
+        # 统计：追加的记录数、fsync次数
+        self.appended = 0
+        self.syncs = 0
+
+    @staticmethod
+    def default_state():
+        return {"mode": "clock", "timer_accumulated_ns": 0, "countdown_ns": 0}
+
+    @property
+    def pending(self):
+        """是否有尚未fsync的记录"""
+        return self._unsynced > 0
+
+    # ---- 回放 ----
+
+    def load(self):
+        """读取快照并回放日志，返回恢复的状态"""
+        state = self.default_state()
+        try:
+            if os.path.exists(self.snapshot_path):
+                with open(self.snapshot_path, 'r') as f:
+                    data = json.load(f)
+                state["mode"] = data.get("mode", "clock")
+                if "timer_accumulated_ns" in data:
+                    state["timer_accumulated_ns"] = int(data["timer_accumulated_ns"])
+                else:
+                    # 兼容旧版本保存的秒数
+                    state["timer_accumulated_ns"] = int(data.get("timer_accumulated", 0) * NS_PER_SEC)
+                state["countdown_ns"] = int(data.get("countdown_ns", 0))
+        except Exception as e:
+            print(f"加载计时数据失败: {e}")
+        self._records = 0
+        try:
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'rb+') as f:
+                    data = f.read()
+                    # 最后一段没有换行符，是崩溃时写了一半的记录：丢弃并从文件中截掉，
+                    # 否则之后追加的记录会接在这段后面写成同一行
+                    end = data.rfind(b"\n") + 1
+                    if end < len(data):
+                        f.truncate(end)
+                self._records = data.count(b"\n", 0, end)
+                self._replay(state, _lines_backwards(data, end))
+        except Exception as e:
+            print(f"回放计时日志失败: {e}")
+        self.state = state
+        return dict(state)
+
+    @staticmethod
+    def _replay(state, lines):
+        """把日志记录应用到state上，lines按从新到旧的顺序给出
+
+        记录都是绝对值，只需从末尾向前找到每项状态最后一次出现的记录，
+        找齐后不再读取更早的记录。
+        """
+        mode = accumulated = countdown = None
+        for line in lines:
+            kind = line[:1]
+            value = None
+            if kind == PAUSE or kind == START or kind == COUNTDOWN:
+                try:
+                    value = int(line[2:])
+                except ValueError:
+                    # 无法解析的记录（如损坏的行）跳过，不影响其他记录
+                    continue
+            if accumulated is None:
+                if kind == PAUSE or kind == START:
+                    accumulated = value
+                elif kind == RESET:
+                    accumulated = 0
+            if countdown is None and kind == COUNTDOWN:
+                countdown = value
+            if mode is None:
+                if kind == PAUSE or kind == START:
+                    mode = "timer"
+                elif kind == COUNTDOWN:
+                    mode = "countdown"
+                elif kind == MODE and line[2:] in MODES:
+                    mode = line[2:]
+            if mode is not None and accumulated is not None and countdown is not None:
+                break
+        if mode is not None:
+            state["mode"] = mode
+        if accumulated is not None:
+            state["timer_accumulated_ns"] = accumulated
+        if countdown is not None:
+            state["countdown_ns"] = countdown
+
+    # ---- 追加 ----
+
+    def append(self, kind, value=""):
+        """追加一条记录，达到批次大小或时间间隔时fsync"""
+        line = f"{kind} {value}"
+        self._replay(self.state, (line,))
+        try:
+            if self._file is None:
+                self._file = open(self.journal_path, 'a')
+            self._file.write(line + "\n")
+            self.appended += 1
+            self._records += 1
+            self._unsynced += 1
+            if self._records >= self.compact_after:
+                self.compact()
+            elif not self.batching and (
+                    self._unsynced >= self.sync_batch
+                    or time.monotonic() - self._last_sync >= self.sync_interval):
+                self.sync()
+        except Exception as e:
+            print(f"保存计时数据失败: {e}")
+
+    def sync(self):
+        """把已追加的记录写入磁盘"""
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.syncs += 1
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def compact(self):
+        """把当前状态原子地写成快照，然后清空日志"""
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                "mode": self.state["mode"],
+                "timer_accumulated": self.state["timer_accumulated_ns"] / NS_PER_SEC,
+                "timer_accumulated_ns": self.state["timer_accumulated_ns"],
+                "countdown_ns": self.state["countdown_ns"],
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # 快照已落盘，之后崩溃重复回放旧日志也不会改变结果
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.journal_path, 'w')
+        self._records = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """同步并关闭日志文件"""
+        try:
+            self.sync()
+        except Exception as e:
+            print(f"保存计时数据失败: {e}")
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,221 @@
+import heapq
+import itertools
+
+from clock_source import SYSTEM_CLOCK, NS_PER_SEC
+
+
+class Countdown:
+    """单个命名倒计时，开始/暂停/重置语义与ClockEngine的倒计时一致"""
+
+    __slots__ = ("name", "countdown_ns", "deadline", "expired", "seq")
+
+    def __init__(self, name, countdown_ns):
+        self.name = name
+        # 剩余时间（纳秒），运行时为最近一次开始时的剩余时间
+        self.countdown_ns = countdown_ns
+        # 到期时刻（TimerManager.clock的monotonic_ns），未运行时为None
+        self.deadline = None
+        self.expired = False
+        # 当前有效的堆条目序号，用于延迟删除
+        self.seq = None
+
+    @property
+    def running(self):
+        return self.deadline is not None
+
+    def remaining_ns(self, now_ns):
+        if self.expired:
+            return 0
+        if self.deadline is None:
+            return self.countdown_ns
+        return max(0, self.deadline - now_ns)
+
+
+class TimerManager:
+    """管理大量命名倒计时，用最小堆只跟踪最早的到期时刻
+
+    取消和暂停采用延迟删除：堆中过期的条目在弹出时丢弃，
+    失效条目过多时整体重建堆。
+    """
+
+    def __init__(self, clock=SYSTEM_CLOCK):
+        self.clock = clock
+        self._timers = {}
+        self._heap = []  # (deadline, seq, name)
+        self._seq = itertools.count()
+        self._stale = 0  # 堆中失效条目数
+
+    def __len__(self):
+        return len(self._timers)
+
+    def __contains__(self, name):
+        return name in self._timers
+
+    def __iter__(self):
+        return iter(self._timers.values())
+
+    def get(self, name):
+        return self._timers.get(name)
+
+    @property
+    def running_count(self):
+        # 运行中的倒计时数：堆中除失效条目外每个条目对应一个运行中的倒计时，O(1)
+        return len(self._heap) - self._stale
+
+    # ---- 增删 ----
+
+    def add(self, name, hours=0, minutes=0, seconds=0, start=False):
+        """添加（或覆盖）一个命名倒计时，O(log n)"""
+        if name in self._timers:
+            self.cancel(name)
+        timer = Countdown(name, (hours * 3600 + minutes * 60 + seconds) * NS_PER_SEC)
+        self._timers[name] = timer
+        if start:
+            self._start(timer, self.clock.monotonic_ns())
+        return timer
+
+    def cancel(self, name):
+        """删除一个命名倒计时，堆条目延迟删除"""
+        timer = self._timers.pop(name, None)
+        if timer is None:
+            return False
+        self._unschedule(timer)
+        return True
+
+    # ---- 与set_countdown/toggle_countdown相同的操作 ----
+
+    def set_countdown(self, name, hours=0, minutes=0, seconds=0):
+        # 设置倒计时时间，停止计时
+        timer = self._timers.get(name)
+        if timer is None:
+            return self.add(name, hours, minutes, seconds)
+        self._unschedule(timer)
+        timer.countdown_ns = (hours * 3600 + minutes * 60 + seconds) * NS_PER_SEC
+        timer.expired = False
+        return timer
+
+    def toggle_countdown(self, name):
+        # 切换倒计时状态（开始/暂停）
+        timer = self._timers[name]
+        if timer.running:
+            self.pause(name)
+        else:
+            self.start(name)
+
+    def start(self, name):
+        timer = self._timers[name]
+        if not timer.running:
+            self._start(timer, self.clock.monotonic_ns())
+
+    def pause(self, name):
+        # 暂停倒计时，以整数纳秒保存剩余时间
+        timer = self._timers[name]
+        if timer.running:
+            timer.countdown_ns = timer.remaining_ns(self.clock.monotonic_ns())
+            self._unschedule(timer)
+
+    def reset(self, name):
+        # 重置倒计时，恢复到最近一次开始时的剩余时间
+        timer = self._timers[name]
+        self._unschedule(timer)
+        timer.expired = False
+
+    def remaining_ns(self, name, now_ns=None):
+        if now_ns is None:
+            now_ns = self.clock.monotonic_ns()
+        return self._timers[name].remaining_ns(now_ns)
+
+    # ---- 到期查询 ----
+
+    def next_deadline(self):
+        """返回最早的到期时刻（clock.monotonic_ns），没有运行中的倒计时时返回None"""
+        self._drop_stale_head()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_expired(self, now_ns=None):
+        """取出所有已到期的倒计时，按到期先后返回名称列表"""
+        if now_ns is None:
+            now_ns = self.clock.monotonic_ns()
+        expired = []
+        heap = self._heap
+        while heap:
+            if not self._is_live(heap[0]):
+                heapq.heappop(heap)
+                self._stale -= 1
+                continue
+            deadline, seq, name = heap[0]
+            if deadline > now_ns:
+                break
+            heapq.heappop(heap)
+            timer = self._timers[name]
+            timer.deadline = None
+            timer.seq = None
+            timer.expired = True
+            expired.append(name)
+        return expired
+
+    def expiring_within(self, seconds, now_ns=None):
+        """返回在seconds秒内到期的倒计时[(名称, 剩余纳秒)]，按到期先后排序
+
+        只遍历堆中到期时刻不超过上限的节点及其子节点，
+        代价与结果数量相关而不是与倒计时总数相关。
+        """
+        if now_ns is None:
+            now_ns = self.clock.monotonic_ns()
+        limit = now_ns + int(seconds * NS_PER_SEC)
+        heap = self._heap
+        result = []
+        pending = [0] if heap else []
+        while pending:
+            i = pending.pop()
+            deadline, seq, name = heap[i]
+            if deadline > limit:
+                continue
+            if self._is_live(heap[i]):
+                result.append((deadline, name))
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    pending.append(child)
+        result.sort()
+        return [(name, max(0, deadline - now_ns)) for deadline, name in result]
+
+    def resume_after_suspend(self, suspended_ns):
+        """系统挂起了suspended_ns纳秒：所有运行中的倒计时到期时刻一起提前"""
+        # 所有条目减去同一个值，堆的顺序不变，不需要重建
+        self._heap = [(deadline - suspended_ns, seq, name) for deadline, seq, name in self._heap]
+        for timer in self._timers.values():
+            if timer.deadline is not None:
+                timer.deadline -= suspended_ns
+
+    # ---- 内部 ----
+
+    def _start(self, timer, now_ns):
+        timer.expired = False
+        timer.deadline = now_ns + timer.countdown_ns
+        timer.seq = next(self._seq)
+        heapq.heappush(self._heap, (timer.deadline, timer.seq, timer.name))
+
+    def _unschedule(self, timer):
+        if timer.seq is not None:
+            timer.seq = None
+            timer.deadline = None
+            self._stale += 1
+            # 失效条目超过一半时重建堆，保持堆大小与运行中的倒计时数量相当
+            if self._stale > 64 and self._stale * 2 > len(self._heap):
+                self._compact()
+
+    def _is_live(self, entry):
+        # 堆条目是否仍对应运行中的倒计时
+        timer = self._timers.get(entry[2])
+        return timer is not None and timer.seq == entry[1]
+
+    def _drop_stale_head(self):
+        heap = self._heap
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+            self._stale -= 1
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if self._is_live(entry)]
+        heapq.heapify(self._heap)
+        self._stale = 0
@@ -0,0 +1,83 @@
+import json
+import os
+
+# 每个显示帧最多移动一次窗口（约60Hz）
+FRAME_MS = 16
+
+# 窗口位置保存文件
+DEFAULT_POSITION_FILE = os.path.join(os.path.expanduser("~"), ".digital_clock_window.json")
+
+
+def load_window_position(path=DEFAULT_POSITION_FILE):
+    """读取上次保存的窗口位置，返回(x, y)或None"""
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                data = json.load(f)
+            return int(data["x"]), int(data["y"])
+    except Exception as e:
+        print(f"加载窗口位置失败: {e}")
+    return None
+
+
+def save_window_position(x, y, path=DEFAULT_POSITION_FILE):
+    """原子地保存窗口位置"""
+    try:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"x": x, "y": y}, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"保存窗口位置失败: {e}")
+
+
+class DragCoalescer:
+    """合并鼠标拖动事件，每帧最多调用一次geometry移动窗口
+
+    拖动时只记录最新的指针位置（直接取事件里的x_root/y_root，
+    不再调用winfo_pointerx/y查询），由定时器每帧应用一次。
+    """
+
+    def __init__(self, window, on_moved=None, frame_ms=FRAME_MS):
+        self.window = window
+        self.on_moved = on_moved
+        self.frame_ms = frame_ms
+        self._offset = (0, 0)
+        self._target = None
+        self._applied = None
+        self._after_id = None
+        # 收到的拖动事件数和实际调用geometry的次数
+        self.motion_events = 0
+        self.geometry_calls = 0
+
+    def start(self, event):
+        # 记录按下时指针相对窗口左上角的偏移
+        self._offset = (event.x_root - self.window.winfo_x(), event.y_root - self.window.winfo_y())
+        self._target = None
+
+    def motion(self, event):
+        self.motion_events += 1
+        self._target = (event.x_root - self._offset[0], event.y_root - self._offset[1])
+        if self._after_id is None:
+            self._after_id = self.window.after(self.frame_ms, self.apply)
+
+    def apply(self):
+        self._after_id = None
+        if self._target is None or self._target == self._applied:
+            return
+        x, y = self._target
+        self.window.geometry(f"+{x}+{y}")
+        self.geometry_calls += 1
+        self._applied = self._target
+
+    def finish(self, event=None):
+        """松开鼠标：立即应用最后的位置，并通知位置已改变"""
+        if self._after_id is not None:
+            self.window.after_cancel(self._after_id)
+        self.apply()
+        if self._target is not None and self.on_moved is not None:
+            self.on_moved(*self._target)
+        self._target = None
+
+    def report(self):
+        return f"拖动事件: {self.motion_events}，移动窗口: {self.geometry_calls}次"